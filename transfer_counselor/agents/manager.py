@@ -5,12 +5,17 @@ Manages all transfer counseling agents and their interactions.
 """
 
 import os
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Optional
 from datetime import datetime
 import uuid
 
 from agents import Agent, Runner, set_default_openai_key, SQLiteSession
+from openai.types.responses import ResponseTextDeltaEvent
+
+from ..utils.response_cache import ResponseCache, agent_fingerprint
+from ..utils.semantic_cache import SemanticResponseCache
 
 from .financial_aid import FinancialAidAgent
 from .career_counselor import CareerCounselorAgent
@@ -21,9 +26,12 @@ from .coordinator import CoordinatorAgent
 class AgentManager:
     """Manages all transfer counseling agents and their execution"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, response_cache: Optional[ResponseCache] = None,
+                 semantic_cache: Optional[SemanticResponseCache] = None):
         self.logger = logging.getLogger(__name__)
         self.sessions: Dict[str, Any] = {}
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
         
         # Initialize API key
         self.api_key = api_key or self._get_api_key()
@@ -38,6 +46,9 @@ class AgentManager:
         
         # Initialize agents
         self.agents = self._initialize_agents()
+        self._fingerprints = {
+            agent_id: self._fingerprint(wrapper['agent']) for agent_id, wrapper in self.agents.items()
+        }
         
         self.logger.info("Agent manager initialized successfully")
     
@@ -109,6 +120,12 @@ class AgentManager:
             'name': sdk_agent.name
         }
     
+    def _fingerprint(self, sdk_agent) -> str:
+        """Hash the instructions and model config an agent's answers depend on, including its handoffs"""
+        instructions = [sdk_agent.instructions or ""]
+        instructions.extend(handoff.instructions or "" for handoff in sdk_agent.handoffs or [])
+        return agent_fingerprint("\x1e".join(instructions), sdk_agent.model, sdk_agent.model_settings)
+    
     def get_agents(self) -> Dict[str, Any]:
         """Get all initialized agents"""
         return self.agents
@@ -131,6 +148,20 @@ class AgentManager:
     
     def process_with_agent(self, agent_id: str, query: str, session_id: str) -> str:
         """Process query with specified agent using session memory"""
+        return self.process_with_agent_result(agent_id, query, session_id)['response']
+    
+    def process_with_agent_result(self, agent_id: str, query: str, session_id: str,
+                                  use_cache: bool = True) -> Dict[str, Any]:
+        """Process query with specified agent, returning the response and its cache status"""
+        return asyncio.run(self.process_with_agent_result_async(agent_id, query, session_id, use_cache))
+    
+    async def process_with_agent_async(self, agent_id: str, query: str, session_id: str) -> str:
+        """Process query with specified agent using session memory, without blocking the event loop"""
+        return (await self.process_with_agent_result_async(agent_id, query, session_id))['response']
+    
+    async def process_with_agent_result_async(self, agent_id: str, query: str, session_id: str,
+                                              use_cache: bool = True) -> Dict[str, Any]:
+        """Process query with specified agent on the SDK's async runner, returning the response and its cache status"""
         if agent_id not in self.agents:
             raise ValueError(f"Unknown agent: {agent_id}")
         
@@ -139,9 +170,21 @@ class AgentManager:
         # Create session memory for conversation continuity
         session_memory = SQLiteSession(session_id)
         
+        # Answers that depend on earlier turns are never served from or stored in the cache
+        cache_result = {'cache': 'disabled'}
+        if self._caching_enabled():
+            if not use_cache or await session_memory.get_items(limit=1):
+                cache_result = self._record_cache_bypass()
+            else:
+                cache_result = self._lookup_cache(agent_id, query)
+                if 'response' in cache_result:
+                    # Keep session memory consistent with what the student saw
+                    await session_memory.add_items(self._exchange_items(query, cache_result['response']))
+                    return cache_result
+        
         try:
             # Execute with OpenAI Agents SDK
-            response = self.runner.run_sync(
+            response = await self.runner.run(
                 agent,
                 query,
                 session=session_memory
@@ -149,7 +192,9 @@ class AgentManager:
             
             # Extract response content
             if hasattr(response, 'final_output') and response.final_output:
-                return response.final_output
+                if cache_result['cache'] == 'miss':
+                    self._store_cache(agent_id, query, response.final_output)
+                return {**cache_result, 'response': response.final_output}
             else:
                 raise ValueError("No valid response from agent")
                 
@@ -157,6 +202,121 @@ class AgentManager:
             self.logger.error(f"Error processing with agent {agent_id}: {e}")
             raise
     
+    async def stream_with_agent(self, agent_id: str, query: str, session_id: str,
+                                use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an agent's response as {'type': 'delta', 'text'} events, ending with one 'done' event
+        
+        The 'done' event carries the complete response and its cache status.
+        A cache hit arrives as a single delta. If the caller stops consuming
+        early, the run is cancelled and the partial answer is still written
+        to session memory.
+        """
+        if agent_id not in self.agents:
+            raise ValueError(f"Unknown agent: {agent_id}")
+        
+        agent = self.agents[agent_id]['agent']
+        session_memory = SQLiteSession(session_id)
+        
+        cache_result = {'cache': 'disabled'}
+        if self._caching_enabled():
+            if not use_cache or await session_memory.get_items(limit=1):
+                cache_result = self._record_cache_bypass()
+            else:
+                cache_result = self._lookup_cache(agent_id, query)
+                if 'response' in cache_result:
+                    await session_memory.add_items(self._exchange_items(query, cache_result['response']))
+                    yield {'type': 'delta', 'text': cache_result['response']}
+                    yield {'type': 'done', **cache_result}
+                    return
+        
+        streamed = self.runner.run_streamed(agent, query, session=session_memory)
+        parts = []
+        completed = False
+        try:
+            async for event in streamed.stream_events():
+                if event.type == 'raw_response_event' and isinstance(event.data, ResponseTextDeltaEvent):
+                    parts.append(event.data.delta)
+                    yield {'type': 'delta', 'text': event.data.delta}
+            completed = True
+        except Exception as e:
+            self.logger.error(f"Error streaming with agent {agent_id}: {e}")
+            raise
+        finally:
+            if not completed:
+                streamed.cancel()
+                if parts:
+                    await self._record_partial_exchange(session_memory, query, ''.join(parts))
+        
+        # What the student saw; handoffs can stream text from more than one agent
+        response = ''.join(parts) or streamed.final_output
+        if not response:
+            raise ValueError("No valid response from agent")
+        if cache_result['cache'] == 'miss':
+            self._store_cache(agent_id, query, response)
+        yield {'type': 'done', **cache_result, 'response': response}
+    
+    async def _record_partial_exchange(self, session_memory: Any, query: str, partial: str):
+        """Write the text streamed before an aborted run into session memory"""
+        try:
+            # The runner persists the question when the streamed run starts
+            last = await session_memory.get_items(limit=1)
+            if last and last[-1].get('role') == 'user':
+                await session_memory.add_items([{"role": "assistant", "content": partial}])
+            else:
+                await session_memory.add_items(self._exchange_items(query, partial))
+        except Exception as e:
+            self.logger.error(f"Failed to record partial response in session memory: {e}")
+    
+    def _caching_enabled(self) -> bool:
+        """Whether any response cache tier is configured"""
+        return self.response_cache is not None or self.semantic_cache is not None
+    
+    def _record_cache_bypass(self) -> Dict[str, Any]:
+        """Count a request that may not use the caches"""
+        for cache in (self.response_cache, self.semantic_cache):
+            if cache is not None:
+                cache.record_bypass()
+        return {'cache': 'bypass'}
+    
+    def _lookup_cache(self, agent_id: str, query: str) -> Dict[str, Any]:
+        """Look a query up in the exact tier, then the semantic tier
+        
+        Returns a result with 'response' on a hit; the semantic tier's best
+        similarity is reported either way so thresholds can be tuned.
+        """
+        fingerprint = self._fingerprints[agent_id]
+        
+        if self.response_cache is not None:
+            cached, tier = self.response_cache.get(self.response_cache.make_key(agent_id, query, fingerprint))
+            if cached is not None:
+                self.logger.info(f"Served {agent_id} response from the {tier} response cache")
+                return {'response': cached, 'cache': f"hit_{tier}"}
+        
+        result: Dict[str, Any] = {'cache': 'miss'}
+        if self.semantic_cache is not None:
+            cached, similarity = self.semantic_cache.lookup(agent_id, fingerprint, query)
+            result['similarity'] = round(similarity, 4)
+            if cached is not None:
+                self.logger.info(f"Served {agent_id} response from the semantic cache (similarity {similarity:.3f})")
+                return {**result, 'response': cached, 'cache': 'hit_semantic'}
+        return result
+    
+    def _store_cache(self, agent_id: str, query: str, response: str):
+        """Store a fresh agent response in every cache tier"""
+        fingerprint = self._fingerprints[agent_id]
+        if self.response_cache is not None:
+            self.response_cache.put(self.response_cache.make_key(agent_id, query, fingerprint), agent_id, response)
+        if self.semantic_cache is not None:
+            self.semantic_cache.put(agent_id, fingerprint, query, response)
+    
+    @staticmethod
+    def _exchange_items(query: str, response: str) -> list:
+        """Build session memory items for a question and its answer"""
+        return [
+            {"role": "user", "content": query},
+            {"role": "assistant", "content": response}
+        ]
+    
     def get_agent_info(self, agent_id: str) -> Dict[str, Any]:
         """Get information about a specific agent"""
         if agent_id not in self.agents:
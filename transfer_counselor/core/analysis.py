@@ -0,0 +1,132 @@
+"""
+Query Analysis Module
+
+Single-pass analysis of a query shared by guardrails, routing and fallback selection.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Hashable, List, Mapping, Optional, Tuple
+
+from ..utils.cache import LRUCache
+from ..utils.fallback_responses import FallbackTables, get_fallback_engine
+from ..utils.guardrails import GuardrailTables
+from ..utils.matching import TokenIndex, normalize_query, tokenize
+from .routing import RoutingTables
+
+
+@dataclass(frozen=True)
+class QueryAnalysis:
+    """Normalized tokens and per-vocabulary matches for one query"""
+    normalized: str
+    tokens: Tuple[str, ...]
+    routing_scores: Mapping[str, float]
+    routing_matches: Mapping[str, List[str]]
+    guardrail_hits: Tuple[Tuple[Any, ...], ...]
+    fallback_hits: FrozenSet[Tuple[str, str]]
+    routing_version: int
+    guardrail_version: int
+    fallback_version: int
+
+
+@dataclass(frozen=True)
+class AnalysisTables:
+    """Union index compiled from one routing, guardrail and fallback snapshot each"""
+    routing: RoutingTables
+    guardrails: GuardrailTables
+    fallback: FallbackTables
+    index: TokenIndex
+    
+    @classmethod
+    def build(cls, routing: RoutingTables, guardrails: GuardrailTables,
+              fallback: FallbackTables) -> "AnalysisTables":
+        """Compile routing, guardrail and fallback vocabularies into one index"""
+        entries: List[Tuple[Hashable, str, float]] = []
+        for agent_id, keywords in routing.agent_keywords.items():
+            entries.extend((('routing', agent_id), keyword, 1) for keyword in keywords)
+        entries.extend((('guardrail', key), phrase, weight) for key, phrase, weight in guardrails.entries())
+        entries.extend((('fallback', key), phrase, weight) for key, phrase, weight in fallback.entries())
+        return cls(routing=routing, guardrails=guardrails, fallback=fallback, index=TokenIndex(entries))
+    
+    def matches(self, routing: RoutingTables, guardrails: GuardrailTables, fallback: FallbackTables) -> bool:
+        """Whether this index was compiled from exactly these snapshots"""
+        return self.routing is routing and self.guardrails is guardrails and self.fallback is fallback
+
+
+class QueryAnalyzer:
+    """Builds QueryAnalysis objects against the current router, guardrail and fallback snapshots"""
+    
+    def __init__(self, query_router: Any, guardrails: Any, cache_size: int = 1024,
+                 fallback_engine: Optional[Any] = None):
+        self.logger = logging.getLogger(__name__)
+        self.query_router = query_router
+        self.guardrails = guardrails
+        self.fallback_engine = fallback_engine or get_fallback_engine()
+        self.cache = LRUCache(cache_size)
+        
+        self._compile_lock = threading.Lock()
+        self._tables: Optional[AnalysisTables] = None
+    
+    def _current_tables(self) -> AnalysisTables:
+        """Get the union index, recompiling it when any source snapshot changed"""
+        routing, guardrails = self.query_router.tables, self.guardrails.tables
+        fallback = self.fallback_engine.tables
+        tables = self._tables
+        if tables is not None and tables.matches(routing, guardrails, fallback):
+            return tables
+        
+        with self._compile_lock:
+            tables = self._tables
+            if tables is None or not tables.matches(routing, guardrails, fallback):
+                tables = AnalysisTables.build(routing, guardrails, fallback)
+                self._tables = tables
+                self.logger.debug(
+                    f"Compiled analysis index (routing v{routing.version}, guardrails v{guardrails.version}, "
+                    f"fallback v{fallback.version})"
+                )
+        return tables
+    
+    def analyze(self, query: str) -> QueryAnalysis:
+        """Normalize, tokenize and match a query against every vocabulary in one scan"""
+        tables = self._current_tables()
+        normalized = normalize_query(query)
+        key = (tables.routing.version, tables.guardrails.version, tables.fallback.version, normalized)
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        tokens = tuple(tokenize(normalized))
+        scores, matched = tables.index.score(tokens)
+        
+        routing_scores: Dict[str, float] = {agent_id: 0 for agent_id in tables.routing.agent_keywords}
+        routing_matches: Dict[str, List[str]] = {agent_id: [] for agent_id in tables.routing.agent_keywords}
+        guardrail_hits = []
+        fallback_hits = []
+        for (vocabulary, item), score in scores.items():
+            if vocabulary == 'routing':
+                routing_scores[item] = score
+                routing_matches[item] = matched[(vocabulary, item)]
+            elif vocabulary == 'guardrail':
+                guardrail_hits.append(item)
+            else:
+                fallback_hits.append(item)
+        
+        analysis = QueryAnalysis(
+            normalized=normalized,
+            tokens=tokens,
+            routing_scores=routing_scores,
+            routing_matches=routing_matches,
+            guardrail_hits=tuple(guardrail_hits),
+            fallback_hits=frozenset(fallback_hits),
+            routing_version=tables.routing.version,
+            guardrail_version=tables.guardrails.version,
+            fallback_version=tables.fallback.version
+        )
+        self.cache.put(key, analysis)
+        return analysis
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get analysis cache hit-rate statistics"""
+        return self.cache.get_stats()
@@ -0,0 +1,276 @@
+"""
+Guardrail Audit Module
+
+Re-runs guardrail checks over large JSONL or SQLite query logs in parallel chunks.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.guardrails import TransferGuardrails
+from ..utils.matching import tokenize
+
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# Per-process guardrails, built once by the pool initializer
+_worker_guardrails: Optional[TransferGuardrails] = None
+
+
+def iter_jsonl_queries(path: str) -> Iterator[str]:
+    """Stream queries from JSONL records or process_query logs"""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            query = record.get('query') if isinstance(record, dict) else None
+            if isinstance(query, str):
+                yield query
+
+
+def _user_messages(items: Any) -> Iterator[str]:
+    """Yield the text of user messages from one message or a message list"""
+    if isinstance(items, dict):
+        items = [items]
+    for item in items or []:
+        if isinstance(item, dict) and item.get('role') == 'user' and isinstance(item.get('content'), str):
+            yield item['content']
+
+
+def iter_sqlite_queries(path: str, table: Optional[str] = None, column: Optional[str] = None,
+                        batch_size: int = 1000) -> Iterator[str]:
+    """Stream user queries from a SQLite log, session database or SDK session store"""
+    conn = sqlite3.connect(path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        
+        if table and column:
+            cursor = conn.execute(f'SELECT "{column}" FROM "{table}"')
+            parse = lambda value: [value] if isinstance(value, str) else []
+        elif 'agent_messages' in tables:
+            cursor = conn.execute("SELECT message_data FROM agent_messages ORDER BY id")
+            parse = lambda value: _user_messages(json.loads(value))
+        elif 'sessions' in tables:
+            cursor = conn.execute("SELECT conversation_history FROM sessions")
+            parse = lambda value: _user_messages(json.loads(value or '[]'))
+        else:
+            raise ValueError(f"No query log table found in {path}; pass a table and column")
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (value,) in rows:
+                yield from parse(value)
+    finally:
+        conn.close()
+
+
+def iter_logged_queries(path: str, table: Optional[str] = None, column: Optional[str] = None) -> Iterator[str]:
+    """Stream queries from a JSONL or SQLite log, chosen by file extension"""
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return iter_sqlite_queries(path, table, column)
+    return iter_jsonl_queries(path)
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most chunk_size items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker(topics: Dict[str, Any]):
+    """Build the worker's guardrails from the parent's topic tables"""
+    global _worker_guardrails
+    _worker_guardrails = TransferGuardrails(cache_size=0)
+    _worker_guardrails.update_topics(**topics)
+
+
+def audit_chunk(queries: List[str], start: int = 0, write_verdicts: bool = True,
+                guardrails: Optional[TransferGuardrails] = None) -> Dict[str, Any]:
+    """Evaluate a chunk of queries, returning serialized verdicts and aggregate counts"""
+    guardrails = guardrails or _worker_guardrails
+    index = guardrails.tables.index
+    
+    lines = []
+    categories: Counter = Counter()
+    hits_counter: Counter = Counter()
+    allowed = 0
+    for offset, query in enumerate(queries):
+        hits, _ = index.score(tokenize(query))
+        verdict = guardrails.verdict_from_hits(hits)
+        categories[verdict['category']] += 1
+        allowed += verdict['allowed']
+        hits_counter.update((kind, category, keyword) for kind, _, category, keyword in hits)
+        if write_verdicts:
+            # Serialize in the worker so the parent only has to write
+            lines.append(json.dumps({'line': start + offset, 'query': query, **verdict}) + '\n')
+    
+    return {
+        'count': len(queries),
+        'allowed': allowed,
+        'categories': categories,
+        'hits': hits_counter,
+        'lines': lines
+    }
+
+
+class GuardrailAuditor:
+    """Fans chunks of logged queries out to a process pool and aggregates verdicts"""
+    
+    def __init__(self, guardrails: Optional[TransferGuardrails] = None, workers: Optional[int] = None,
+                 chunk_size: int = 5000, max_pending: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.guardrails = guardrails or TransferGuardrails(cache_size=0)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+        # Bound the chunks held in memory at once, in flight or awaiting in-order writes
+        self.max_pending = max_pending or max(2, self.workers * 2)
+    
+    def _topics(self) -> Dict[str, Any]:
+        """Get picklable copies of the current topic tables for the workers"""
+        tables = self.guardrails.tables
+        return {
+            'allowed_topics': {category: list(keywords) for category, keywords in tables.allowed_topics.items()},
+            'blocked_topics': list(tables.blocked_topics),
+            'transfer_indicators': list(tables.transfer_indicators)
+        }
+    
+    def _iter_results(self, chunks: Iterator[List[str]], write_verdicts: bool) -> Iterator[Dict[str, Any]]:
+        """Evaluate chunks in order, in-process or through a bounded process pool"""
+        start = 0
+        if self.workers <= 1:
+            for chunk in chunks:
+                yield audit_chunk(chunk, start, write_verdicts, self.guardrails)
+                start += len(chunk)
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self._topics(),)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(audit_chunk, chunk, start, write_verdicts))
+                start += len(chunk)
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def run(self, queries: Iterable[str], output_path: Optional[str] = None,
+            source: Optional[str] = None) -> Dict[str, Any]:
+        """Audit a stream of queries, writing verdicts incrementally and returning a report"""
+        start = time.perf_counter()
+        categories: Counter = Counter()
+        hits_counter: Counter = Counter()
+        total = allowed = 0
+        
+        output = open(output_path, 'w') if output_path else None
+        try:
+            for result in self._iter_results(iter_chunks(queries, self.chunk_size), output is not None):
+                if output:
+                    output.writelines(result['lines'])
+                total += result['count']
+                allowed += result['allowed']
+                categories.update(result['categories'])
+                hits_counter.update(result['hits'])
+                self.logger.debug(f"Audited {total} queries")
+        finally:
+            if output:
+                output.close()
+        
+        report = self._build_report(hits_counter)
+        report.update({
+            'source': source,
+            'timestamp': datetime.now().isoformat(),
+            'total': total,
+            'allowed': allowed,
+            'rejected': total - allowed,
+            'categories': dict(categories.most_common()),
+            'elapsed_seconds': time.perf_counter() - start
+        })
+        self.logger.info(f"Guardrail audit of {total} queries: {allowed} allowed, {total - allowed} rejected")
+        return report
+    
+    def _build_report(self, hits_counter: Counter) -> Dict[str, Any]:
+        """Rank every topic entry by hit count, listing entries that never fired"""
+        tables = self.guardrails.tables
+        
+        blocked = {topic: hits_counter[('blocked', None, topic)] for topic in tables.blocked_topics}
+        allowed = {
+            category: {keyword: hits_counter[('allowed', category, keyword)] for keyword in keywords}
+            for category, keywords in tables.allowed_topics.items()
+        }
+        indicators = {
+            indicator: hits_counter[('indicator', None, indicator)] for indicator in tables.transfer_indicators
+        }
+        
+        by_count = lambda counts: dict(sorted(counts.items(), key=lambda item: -item[1]))
+        return {
+            'tables_version': tables.version,
+            'blocked_topics': by_count(blocked),
+            'allowed_topics': {category: by_count(counts) for category, counts in allowed.items()},
+            'transfer_indicators': by_count(indicators),
+            'dead_entries': {
+                'blocked_topics': [topic for topic, count in blocked.items() if not count],
+                'allowed_topics': [
+                    f"{category}:{keyword}"
+                    for category, counts in allowed.items() for keyword, count in counts.items() if not count
+                ],
+                'transfer_indicators': [indicator for indicator, count in indicators.items() if not count]
+            }
+        }
+
+
+def run_audit(log_path: str, output_path: Optional[str] = None, tables_path: Optional[str] = None,
+              workers: Optional[int] = None, chunk_size: int = 5000,
+              table: Optional[str] = None, column: Optional[str] = None) -> Dict[str, Any]:
+    """Audit one JSONL or SQLite query log against the current (or file-provided) topic tables"""
+    guardrails = TransferGuardrails(cache_size=0)
+    if tables_path:
+        guardrails.reload_from_file(tables_path)
+    
+    auditor = GuardrailAuditor(guardrails, workers=workers, chunk_size=chunk_size)
+    return auditor.run(iter_logged_queries(log_path, table, column), output_path, source=log_path)
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    """Run a guardrail audit from the command line"""
+    parser = argparse.ArgumentParser(description="Re-run guardrail checks over a JSONL or SQLite query log")
+    parser.add_argument('log', help="JSONL file with 'query' fields, or a SQLite session/log database")
+    parser.add_argument('--output', help="Write one JSON verdict per query to this JSONL file")
+    parser.add_argument('--report', help="Write the JSON summary report here instead of stdout")
+    parser.add_argument('--tables', help="YAML/JSON file with a 'guardrails' section to audit against")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count, 1 runs inline)")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--table', help="SQLite table holding raw query text")
+    parser.add_argument('--column', help="SQLite column holding raw query text")
+    args = parser.parse_args(argv)
+    
+    report = run_audit(args.log, args.output, args.tables, args.workers, args.chunk_size, args.table, args.column)
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Audited {report['total']} queries: {report['allowed']} allowed, {report['rejected']} rejected "
+              f"({report['elapsed_seconds']:.1f}s)")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Batch Routing Module
+
+Vectorized routing of large query sets against compiled keyword tables.
+"""
+
+import logging
+from typing import Dict, Any, Iterable, List
+
+import numpy as np
+
+from ..utils.matching import TokenIndex, tokenize
+
+
+class BatchRouter:
+    """Scores many queries at once against an agent x term weight matrix"""
+    
+    def __init__(self, index: TokenIndex, agent_ids: Iterable[str], default_agent: str = 'coordinator'):
+        self.logger = logging.getLogger(__name__)
+        self.index = index
+        self.agent_ids = list(agent_ids)
+        self.default_agent = default_agent
+        
+        # Assign a column to every indexed term
+        self.terms = list(index.postings)
+        self.term_ids = {ngram: column for column, ngram in enumerate(self.terms)}
+        
+        # Precompute the agent x term weight matrix
+        weights = [
+            weight for postings in index.postings.values() for weight in postings.values()
+        ]
+        dtype = np.asarray(weights or [0]).dtype
+        self.weights = np.zeros((len(self.agent_ids), len(self.terms)), dtype=dtype)
+        agent_rows = {agent_id: row for row, agent_id in enumerate(self.agent_ids)}
+        for ngram, postings in index.postings.items():
+            for agent_id, weight in postings.items():
+                if agent_id in agent_rows:
+                    self.weights[agent_rows[agent_id], self.term_ids[ngram]] = weight
+        
+        self.logger.debug(f"Built {self.weights.shape[0]}x{self.weights.shape[1]} routing weight matrix")
+    
+    def _featurize(self, queries: List[str]):
+        """Convert queries into sparse (row, term) coordinates of present terms"""
+        rows: List[int] = []
+        columns: List[int] = []
+        
+        # Logged traffic repeats phrasings heavily, so each distinct query is matched once
+        seen: Dict[str, List[int]] = {}
+        for row, query in enumerate(queries):
+            term_columns = seen.get(query)
+            if term_columns is None:
+                term_columns = [self.term_ids[ngram] for ngram in self.index.find(tokenize(query))]
+                seen[query] = term_columns
+            rows.extend([row] * len(term_columns))
+            columns.extend(term_columns)
+        
+        return np.asarray(rows, dtype=np.int64), np.asarray(columns, dtype=np.int64)
+    
+    def score(self, queries: List[str]):
+        """Get a (queries x agents) score matrix plus the sparse term coordinates"""
+        rows, columns = self._featurize(queries)
+        
+        # Sparse-dense product: accumulate term weights into each query row
+        scores = np.zeros((len(queries), len(self.agent_ids)), dtype=self.weights.dtype)
+        for agent_row in range(len(self.agent_ids)):
+            scores[:, agent_row] = np.bincount(
+                rows, weights=self.weights[agent_row, columns], minlength=len(queries)
+            )
+        
+        return scores, rows, columns
+    
+    def route(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Route a list of queries, returning one routing result per query"""
+        if not queries:
+            return []
+        
+        scores, rows, columns = self.score(queries)
+        
+        # Ties resolve to the first agent, matching the scalar router
+        best = scores.argmax(axis=1)
+        has_match = scores[np.arange(len(queries)), best] > 0
+        
+        matched_keywords: List[Dict[str, List[str]]] = [
+            {agent_id: [] for agent_id in self.agent_ids} for _ in queries
+        ]
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            ngram = self.terms[column]
+            phrase = self.index.phrases[ngram]
+            for agent_id in self.index.postings[ngram]:
+                if agent_id in matched_keywords[row]:
+                    matched_keywords[row][agent_id].append(phrase)
+        
+        results = []
+        for row, score_row in enumerate(scores.tolist()):
+            results.append({
+                'selected_agent': self.agent_ids[best[row]] if has_match[row] else self.default_agent,
+                'agent_scores': dict(zip(self.agent_ids, score_row)),
+                'matched_keywords': matched_keywords[row]
+            })
+        
+        return results
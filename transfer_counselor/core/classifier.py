@@ -0,0 +1,208 @@
+"""
+Routing Classifier Module
+
+Lightweight trainable query classifier used as an optional routing mode.
+"""
+
+import argparse
+import json
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.matching import hash_ngrams, tokenize
+
+
+class RoutingClassifier:
+    """Multinomial naive Bayes over hashed token n-grams with temperature calibration"""
+    
+    def __init__(self, labels: Sequence[str], n_features: int = 2 ** 15,
+                 ngram_range: Tuple[int, int] = (1, 2), alpha: float = 0.5):
+        self.logger = logging.getLogger(__name__)
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.alpha = alpha
+        
+        self.class_log_prior = np.zeros(len(self.labels), dtype=np.float32)
+        self.feature_log_prob = np.zeros((len(self.labels), n_features), dtype=np.float32)
+        self.temperature = 1.0
+    
+    def featurize(self, query: str, tokens: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Convert a query (or its precomputed tokens) into an array of hashed feature indices"""
+        if tokens is None:
+            tokens = tokenize(query)
+        return np.asarray(
+            hash_ngrams(tokens, self.n_features, self.ngram_range), dtype=np.int64
+        )
+    
+    def _count_features(self, queries: Sequence[str], label_ids: np.ndarray) -> np.ndarray:
+        """Accumulate per-class feature counts"""
+        counts = np.zeros((len(self.labels), self.n_features), dtype=np.float64)
+        for query, label_id in zip(queries, label_ids):
+            np.add.at(counts[label_id], self.featurize(query), 1.0)
+        return counts
+    
+    def _fit_counts(self, queries: Sequence[str], label_ids: np.ndarray):
+        """Estimate priors and smoothed feature log-probabilities"""
+        class_counts = np.bincount(label_ids, minlength=len(self.labels)).astype(np.float64)
+        self.class_log_prior = np.log((class_counts + 1.0) / (class_counts.sum() + len(self.labels))).astype(np.float32)
+        
+        counts = self._count_features(queries, label_ids) + self.alpha
+        self.feature_log_prob = (np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))).astype(np.float32)
+    
+    def fit(self, queries: Sequence[str], labels: Sequence[str]) -> "RoutingClassifier":
+        """Train the model on labeled queries and calibrate its probabilities"""
+        unknown = set(labels) - set(self.labels)
+        if unknown:
+            raise ValueError(f"Unknown labels: {sorted(unknown)}")
+        
+        label_ids = np.asarray([self.labels.index(label) for label in labels], dtype=np.int64)
+        queries = list(queries)
+        
+        # Calibrate the temperature on a held-out slice, then refit on everything
+        self.temperature = 1.0
+        if len(queries) >= 50:
+            holdout = np.arange(len(queries)) % 5 == 0
+            train_queries = [q for q, held in zip(queries, holdout) if not held]
+            self._fit_counts(train_queries, label_ids[~holdout])
+            held_queries = [q for q, held in zip(queries, holdout) if held]
+            self.temperature = self._calibrate_temperature(held_queries, label_ids[holdout])
+        
+        self._fit_counts(queries, label_ids)
+        self.logger.info(f"Trained routing classifier on {len(queries)} queries (temperature={self.temperature:.3f})")
+        return self
+    
+    def _calibrate_temperature(self, queries: Sequence[str], label_ids: np.ndarray) -> float:
+        """Pick the softmax temperature minimizing held-out negative log-likelihood"""
+        logits = self._log_joint_many(queries)
+        best_temperature, best_loss = 1.0, np.inf
+        
+        for temperature in np.logspace(-1, 2, 61):
+            probabilities = self._softmax(logits / temperature)
+            loss = -np.mean(np.log(probabilities[np.arange(len(label_ids)), label_ids] + 1e-12))
+            if loss < best_loss:
+                best_temperature, best_loss = float(temperature), loss
+        
+        return best_temperature
+    
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        """Row-wise softmax"""
+        shifted = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(shifted)
+        return exp / exp.sum(axis=-1, keepdims=True)
+    
+    def _log_joint_many(self, queries: Sequence[str]) -> np.ndarray:
+        """Get unnormalized class log-probabilities for many queries"""
+        rows: List[int] = []
+        columns: List[np.ndarray] = []
+        for row, query in enumerate(queries):
+            features = self.featurize(query)
+            rows.extend([row] * len(features))
+            columns.append(features)
+        
+        rows_array = np.asarray(rows, dtype=np.int64)
+        columns_array = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+        
+        logits = np.tile(self.class_log_prior.astype(np.float64), (len(queries), 1))
+        for label_id in range(len(self.labels)):
+            logits[:, label_id] += np.bincount(
+                rows_array, weights=self.feature_log_prob[label_id, columns_array], minlength=len(queries)
+            )
+        return logits
+    
+    def predict_proba(self, query: str, tokens: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """Get calibrated per-agent probabilities for a query"""
+        features = self.featurize(query, tokens)
+        logits = self.class_log_prior + self.feature_log_prob[:, features].sum(axis=1)
+        probabilities = self._softmax(logits / self.temperature)
+        return dict(zip(self.labels, probabilities.tolist()))
+    
+    def predict_proba_many(self, queries: Sequence[str]) -> np.ndarray:
+        """Get a (queries x labels) matrix of calibrated probabilities"""
+        if not queries:
+            return np.zeros((0, len(self.labels)))
+        return self._softmax(self._log_joint_many(queries) / self.temperature)
+    
+    def predict(self, query: str) -> Tuple[str, float]:
+        """Get the most likely agent and its probability"""
+        probabilities = self.predict_proba(query)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+    
+    def save(self, path: str):
+        """Save the model as a compressed NumPy array file"""
+        np.savez_compressed(
+            path,
+            labels=np.asarray(self.labels),
+            n_features=self.n_features,
+            ngram_range=np.asarray(self.ngram_range),
+            alpha=self.alpha,
+            temperature=self.temperature,
+            class_log_prior=self.class_log_prior,
+            feature_log_prob=self.feature_log_prob.astype(np.float16)
+        )
+        self.logger.info(f"Saved routing classifier to {path}")
+    
+    @classmethod
+    def load(cls, path: str) -> "RoutingClassifier":
+        """Load a model saved with save()"""
+        with np.load(path) as data:
+            model = cls(
+                labels=[str(label) for label in data['labels']],
+                n_features=int(data['n_features']),
+                ngram_range=tuple(int(n) for n in data['ngram_range']),
+                alpha=float(data['alpha'])
+            )
+            model.temperature = float(data['temperature'])
+            model.class_log_prior = data['class_log_prior'].astype(np.float32)
+            model.feature_log_prob = data['feature_log_prob'].astype(np.float32)
+        return model
+    
+    @classmethod
+    def from_jsonl(cls, path: str, **kwargs) -> "RoutingClassifier":
+        """Train a model from a JSONL file of labeled queries or routing logs"""
+        queries, labels = load_labeled_queries(path)
+        return cls(sorted(set(labels)), **kwargs).fit(queries, labels)
+
+
+def load_labeled_queries(path: str) -> Tuple[List[str], List[str]]:
+    """Read (query, agent) pairs from JSONL records or process_query logs"""
+    queries: List[str] = []
+    labels: List[str] = []
+    
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record: Dict[str, Any] = json.loads(line)
+            query = record.get('query')
+            label = record.get('expected_agent') or record.get('agent') or record.get('agent_used')
+            if query is not None and label:
+                queries.append(query)
+                labels.append(label)
+    
+    return queries, labels
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    """Train a routing classifier from the command line"""
+    parser = argparse.ArgumentParser(description="Train the routing classifier from labeled queries")
+    parser.add_argument('input', help="JSONL file with 'query' and 'expected_agent' (or 'agent'/'agent_used') fields")
+    parser.add_argument('output', help="Output model path (.npz)")
+    parser.add_argument('--n-features', type=int, default=2 ** 15)
+    parser.add_argument('--max-ngram', type=int, default=2)
+    args = parser.parse_args(argv)
+    
+    model = RoutingClassifier.from_jsonl(
+        args.input, n_features=args.n_features, ngram_range=(1, args.max_ngram)
+    )
+    model.save(args.output)
+    print(f"Saved {len(model.labels)}-class routing classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Routing Evaluation Module
+
+Offline accuracy and latency benchmarks for query routers over labeled query sets.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from .classifier import load_labeled_queries
+from .routing import QueryRouter
+
+
+ROUTER_KINDS = ['keyword', 'cached', 'classifier', 'batch']
+
+
+def build_router(kind: str, model_path: Optional[str] = None) -> QueryRouter:
+    """Build a router configured for one of the supported evaluation modes"""
+    if kind not in ROUTER_KINDS:
+        raise ValueError(f"Unknown router kind: {kind} (expected one of {ROUTER_KINDS})")
+    
+    # Only the cached mode keeps the routing cache, so the others measure raw matching
+    router = QueryRouter(cache_size=1024 if kind == 'cached' else 0)
+    
+    if kind == 'classifier':
+        if not model_path:
+            raise ValueError("The classifier router needs a model path")
+        router.load_classifier(model_path)
+    
+    return router
+
+
+def make_predictor(router: Any, surface: str = 'route_query') -> Callable[[str], str]:
+    """Wrap a router's public surface as a query -> agent function"""
+    if callable(router) and not hasattr(router, surface):
+        return router
+    if surface == 'route_query':
+        return router.route_query
+    if surface == 'get_routing_explanation':
+        return lambda query: router.get_routing_explanation(query)['selected_agent']
+    if surface == 'route':
+        return lambda query: router.route(query).target_agent
+    raise ValueError(f"Unsupported routing surface: {surface}")
+
+
+def _percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """Get a nearest-rank percentile from sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(expected: Sequence[str], predicted: Sequence[str],
+              latencies_us: Sequence[float], queries: Sequence[str],
+              max_examples: int = 20) -> Dict[str, Any]:
+    """Compute accuracy, confusion matrix, coordinator rates and latency percentiles"""
+    total = len(expected)
+    correct = sum(1 for want, got in zip(expected, predicted) if want == got)
+    
+    confusion: Dict[str, Dict[str, int]] = {}
+    for want, got in zip(expected, predicted):
+        row = confusion.setdefault(want, {})
+        row[got] = row.get(got, 0) + 1
+    
+    specialist_total = sum(1 for want in expected if want != 'coordinator')
+    fall_through = sum(
+        1 for want, got in zip(expected, predicted) if want != 'coordinator' and got == 'coordinator'
+    )
+    
+    per_agent = {}
+    for agent_id in sorted(set(expected) | set(predicted)):
+        true_positive = sum(1 for want, got in zip(expected, predicted) if want == got == agent_id)
+        predicted_count = sum(1 for got in predicted if got == agent_id)
+        expected_count = sum(1 for want in expected if want == agent_id)
+        per_agent[agent_id] = {
+            'precision': true_positive / predicted_count if predicted_count else 0.0,
+            'recall': true_positive / expected_count if expected_count else 0.0,
+            'support': expected_count
+        }
+    
+    ordered = sorted(latencies_us)
+    misrouted = [
+        {'query': query, 'expected': want, 'predicted': got}
+        for query, want, got in zip(queries, expected, predicted) if want != got
+    ]
+    
+    return {
+        'count': total,
+        'accuracy': correct / total if total else 0.0,
+        'coordinator_rate': sum(1 for got in predicted if got == 'coordinator') / total if total else 0.0,
+        'coordinator_fall_through_rate': fall_through / specialist_total if specialist_total else 0.0,
+        'per_agent': per_agent,
+        'confusion_matrix': confusion,
+        'latency_us': {
+            'mean': sum(ordered) / len(ordered) if ordered else 0.0,
+            'p50': _percentile(ordered, 50),
+            'p90': _percentile(ordered, 90),
+            'p99': _percentile(ordered, 99),
+            'max': ordered[-1] if ordered else 0.0
+        },
+        'misrouted_examples': misrouted[:max_examples]
+    }
+
+
+def evaluate_predictor(predict: Callable[[str], str], dataset: Iterable[Tuple[str, str]],
+                       name: str = 'router', repeat: int = 1) -> Dict[str, Any]:
+    """Run a predictor over (query, expected_agent) pairs and report accuracy and latency"""
+    queries: List[str] = []
+    expected: List[str] = []
+    for query, label in dataset:
+        queries.append(query)
+        expected.append(label)
+    
+    predicted: List[str] = []
+    latencies_us: List[float] = []
+    for _ in range(max(1, repeat)):
+        predicted = []
+        for query in queries:
+            start = time.perf_counter_ns()
+            predicted.append(predict(query))
+            latencies_us.append((time.perf_counter_ns() - start) / 1000.0)
+    
+    result = summarize(expected, predicted, latencies_us, queries)
+    result['router'] = name
+    return result
+
+
+def evaluate_batch(router: QueryRouter, dataset: Iterable[Tuple[str, str]],
+                   name: str = 'batch') -> Dict[str, Any]:
+    """Evaluate route_many, reporting the amortized per-query latency"""
+    pairs = list(dataset)
+    queries = [query for query, _ in pairs]
+    expected = [label for _, label in pairs]
+    
+    start = time.perf_counter_ns()
+    results = router.route_many(queries)
+    elapsed_us = (time.perf_counter_ns() - start) / 1000.0
+    
+    per_query = elapsed_us / len(queries) if queries else 0.0
+    predicted = [result['selected_agent'] for result in results]
+    result = summarize(expected, predicted, [per_query] * len(queries), queries)
+    result['router'] = name
+    return result
+
+
+def run_evaluation(dataset_path: str, kinds: Sequence[str], surface: str = 'route_query',
+                   model_path: Optional[str] = None, repeat: int = 1) -> Dict[str, Any]:
+    """Evaluate several router kinds on one labeled JSONL file"""
+    queries, labels = load_labeled_queries(dataset_path)
+    dataset = list(zip(queries, labels))
+    
+    runs = []
+    for kind in kinds:
+        router = build_router(kind, model_path)
+        if kind == 'batch':
+            runs.append(evaluate_batch(router, dataset, name=kind))
+        else:
+            runs.append(evaluate_predictor(make_predictor(router, surface), dataset, name=kind, repeat=repeat))
+        runs[-1]['tables_version'] = router.tables.version
+    
+    return {
+        'dataset': dataset_path,
+        'surface': surface,
+        'timestamp': datetime.now().isoformat(),
+        'runs': runs
+    }
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    """Run the routing benchmark from the command line"""
+    parser = argparse.ArgumentParser(description="Evaluate query routers on a labeled JSONL query set")
+    parser.add_argument('dataset', help="JSONL file with 'query' and 'expected_agent' fields")
+    parser.add_argument('--router', action='append', choices=ROUTER_KINDS,
+                        help="Router kind to evaluate (repeatable, default: keyword)")
+    parser.add_argument('--surface', default='route_query',
+                        choices=['route_query', 'get_routing_explanation', 'route'])
+    parser.add_argument('--model', help="Classifier model path for the classifier router")
+    parser.add_argument('--repeat', type=int, default=1, help="Passes over the dataset (warms caches)")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    
+    report = run_evaluation(args.dataset, args.router or ['keyword'], args.surface, args.model, args.repeat)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        for run in report['runs']:
+            print(f"{run['router']}: accuracy={run['accuracy']:.3f} "
+                  f"coordinator_fall_through={run['coordinator_fall_through_rate']:.3f} "
+                  f"p50={run['latency_us']['p50']:.1f}us p99={run['latency_us']['p99']:.1f}us")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
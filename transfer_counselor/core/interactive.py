@@ -55,10 +55,27 @@ class InteractiveSessionManager:
                     print("Please enter a question about UC/CSU transfer, financial aid, careers, or academics.")
                     continue
                 
+                conversation_count += 1
+                if self.system.config.progressive_responses:
+                    # Show the quick answer first, then the agent's answer when it arrives
+                    provisional = None
+                    for result in self.system.process_query_progressive(query, session_id):
+                        if provisional and result['response'] == provisional['response']:
+                            print("ℹ️  The quick answer above is the final answer.")
+                            continue
+                        self._display_response(result, conversation_count)
+                        if result.get('phase') == 'provisional':
+                            provisional = result
+                            print("⏳ Quick answer above; checking with the specialist for a detailed one...")
+                    continue
+                
+                if self.system.config.stream_responses:
+                    self._stream_response(query, session_id, conversation_count)
+                    continue
+                
                 # Process query
                 print("\n🤔 Processing your question with AI agent orchestration...")
                 result = self.system.process_query(query, session_id)
-                conversation_count += 1
                 
                 # Display response
                 self._display_response(result, conversation_count)
@@ -74,7 +91,12 @@ class InteractiveSessionManager:
         """Display formatted response"""
         print("\n" + "="*80)
         agent_name = result['agent_used'].replace('_', ' ').title()
-        print(f"📍 Response #{conversation_count} from: {agent_name}")
+        if result.get('phase') == 'provisional':
+            print(f"📍 Response #{conversation_count} (quick answer) from: {agent_name}")
+        elif result.get('metadata', {}).get('upgraded'):
+            print(f"📍 Response #{conversation_count} (updated) from: {agent_name}")
+        else:
+            print(f"📍 Response #{conversation_count} from: {agent_name}")
         if 'session_id' in result:
             print(f"🔄 Session: {result['session_id'][:8]}...")
         print("="*80)
@@ -85,6 +107,31 @@ class InteractiveSessionManager:
         
         print("\n" + "-"*60)
     
+    def _stream_response(self, query: str, session_id: str, conversation_count: int):
+        """Print response text as it arrives, followed by the response details"""
+        print("\n" + "="*80)
+        print(f"📍 Response #{conversation_count}")
+        print("="*80)
+        
+        result = None
+        events = self.system.process_query_stream(query, session_id)
+        try:
+            for event in events:
+                if event['type'] == 'delta':
+                    print(event['text'], end='', flush=True)
+                else:
+                    result = event
+        finally:
+            events.close()
+        print()
+        
+        if result:
+            print(f"\n🤖 Answered by: {result['agent_used'].replace('_', ' ').title()}")
+            if result.get('metadata'):
+                print(f"🔍 Metadata: {result['metadata']}")
+        
+        print("\n" + "-"*60)
+    
     def _show_session_summary(self, session_id: str, conversation_count: int):
         """Show session summary"""
         print(f"\n📊 Session Summary:")
@@ -5,17 +5,96 @@ Handles intelligent routing of user queries to appropriate specialist agents.
 """
 
 import logging
-from typing import Dict, List
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ..utils.cache import LRUCache
+from ..utils.matching import TokenIndex, normalize_query, tokenize
+from ..utils.tables import load_table_file
+
+
+@dataclass(frozen=True)
+class RoutingTables:
+    """Immutable snapshot of agent keyword tables and their compiled index"""
+    agent_keywords: Mapping[str, Tuple[str, ...]]
+    index: TokenIndex
+    version: int
+    
+    @classmethod
+    def build(cls, agent_keywords: Mapping[str, Iterable[str]], version: int = 0) -> "RoutingTables":
+        """Compile keyword lists into a snapshot"""
+        keywords = MappingProxyType({
+            agent_id: tuple(agent_list) for agent_id, agent_list in agent_keywords.items()
+        })
+        index = TokenIndex(
+            (agent_id, keyword, 1)
+            for agent_id, agent_list in keywords.items()
+            for keyword in agent_list
+        )
+        return cls(agent_keywords=keywords, index=index, version=version)
+
+
+@dataclass
+class RoutingDecision:
+    """Outcome of routing a single query"""
+    agent_id: str
+    agent_scores: Dict[str, float]
+    matched_keywords: Dict[str, List[str]]
+    method: str = 'keyword'  # keyword, classifier, sticky or default
+    probabilities: Optional[Dict[str, float]] = None
+    sticky: bool = False
+    margin: float = 0.0  # Relative lead of the selected agent over the runner-up, 0-1
+    dispatch: str = 'coordinator'  # direct (straight to the specialist) or coordinator
+    
+    @property
+    def target_agent(self) -> str:
+        """Get the agent that should actually run the query"""
+        return self.agent_id if self.dispatch == 'direct' else 'coordinator'
+    
+    def to_metadata(self) -> Dict[str, Any]:
+        """Get a compact summary for response metadata"""
+        return {
+            'agent': self.agent_id,
+            'method': self.method,
+            'sticky': self.sticky,
+            'margin': round(self.margin, 3),
+            'dispatch': self.dispatch,
+            'scores': {agent_id: score for agent_id, score in self.agent_scores.items() if score}
+        }
 
 
 class QueryRouter:
     """Intelligent query router for directing queries to appropriate agents"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024, classifier: Optional[Any] = None,
+                 classifier_threshold: float = 0.5, sticky_decay: float = 0.5,
+                 sticky_threshold: float = 1.0, confidence_threshold: float = 0.3):
         self.logger = logging.getLogger(__name__)
         
+        # Minimum margin for dispatching straight to a specialist instead of the coordinator
+        self.confidence_threshold = confidence_threshold
+        
+        # Session stickiness: queries scoring below the threshold (or tied) lean towards
+        # recent specialists, with a bonus of decay ** turns_ago
+        self.sticky_decay = sticky_decay
+        self.sticky_threshold = sticky_threshold
+        
+        # Routing outcome counters
+        self._stats_lock = threading.Lock()
+        self.routing_stats = Counter()
+        
+        # Optional trained classifier; keyword matching is the fallback
+        self.classifier = classifier
+        self.classifier_threshold = classifier_threshold
+        
+        # Routing results keyed by table version and normalized query text
+        self.cache = LRUCache(cache_size)
+        
         # Define keyword mappings for each agent
-        self.agent_keywords = {
+        agent_keywords = {
             'financial_aid': [
                 'cost', 'money', 'fafsa', 'financial', 'scholarship', 'afford', 
                 'tuition', 'grant', 'expensive', 'budget', 'payment', 'aid',
@@ -35,22 +114,168 @@ class QueryRouter:
                 'occupation', 'work', 'salary', 'internship', 'networking'
             ]
         }
+        
+        # Compiled tables are an immutable snapshot; readers grab it once per request
+        # and writers swap in a new one, so the read path never takes a lock
+        self._update_lock = threading.Lock()
+        self._tables = RoutingTables.build(agent_keywords)
+        self._batch_router = None
     
-    def route_query(self, query: str) -> str:
-        """Route query to appropriate agent based on content"""
-        query_lower = query.lower()
+    @property
+    def tables(self) -> RoutingTables:
+        """Get the current immutable routing snapshot"""
+        return self._tables
+    
+    @property
+    def agent_keywords(self) -> Mapping[str, Tuple[str, ...]]:
+        """Get a read-only view of the current keyword tables"""
+        return self._tables.agent_keywords
+    
+    def _score_query(self, query: str, tables: RoutingTables,
+                     analysis: Optional[Any] = None) -> Tuple[Dict[str, float], Dict[str, List[str]]]:
+        """Score every agent in one pass over the query tokens, using the routing cache"""
+        # A shared query analysis already holds the scores when it matches this snapshot
+        if analysis is not None and analysis.routing_version == tables.version:
+            return analysis.routing_scores, analysis.routing_matches
+        
+        key = (tables.version, normalize_query(query))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
         
-        # Calculate relevance scores for each agent
-        agent_scores = {}
+        scores, matched = tables.index.score(tokenize(key[1]))
         
-        for agent_id, keywords in self.agent_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
-            if score > 0:
-                agent_scores[agent_id] = score
+        agent_scores = {agent_id: scores.get(agent_id, 0) for agent_id in tables.agent_keywords}
+        agent_matches = {agent_id: matched.get(agent_id, []) for agent_id in tables.agent_keywords}
+        
+        self.cache.put(key, (agent_scores, agent_matches))
+        return agent_scores, agent_matches
+    
+    def load_classifier(self, model_path: str):
+        """Load a trained routing classifier and enable classifier routing"""
+        from .classifier import RoutingClassifier
+        self.classifier = RoutingClassifier.load(model_path)
+        self.logger.info(f"Loaded routing classifier from {model_path} ({len(self.classifier.labels)} agents)")
+    
+    def _classify(self, query: str, analysis: Optional[Any] = None) -> Optional[Dict[str, float]]:
+        """Get classifier probabilities, or None when no model is loaded"""
+        if self.classifier is None:
+            return None
+        if analysis is not None:
+            return self.classifier.predict_proba(query, tokens=analysis.tokens)
+        return self.classifier.predict_proba(query)
+    
+    def _confident_prediction(self, probabilities: Optional[Dict[str, float]],
+                              tables: RoutingTables) -> Optional[str]:
+        """Get the classifier's agent when it clears the confidence threshold"""
+        if not probabilities:
+            return None
         
+        best_agent = max(probabilities, key=probabilities.get)
+        if probabilities[best_agent] >= self.classifier_threshold:
+            if best_agent in tables.agent_keywords or best_agent == 'coordinator':
+                return best_agent
+        return None
+    
+    def route(self, query: str, history: Optional[List[str]] = None,
+              analysis: Optional[Any] = None) -> RoutingDecision:
+        """Route a query, optionally preferring recent specialists from the session's history"""
+        tables = self._tables
+        agent_scores, agent_matches = self._score_query(query, tables, analysis)
+        
+        decision = RoutingDecision(
+            agent_id='coordinator',
+            agent_scores=agent_scores,
+            matched_keywords={agent_id: list(keywords) for agent_id, keywords in agent_matches.items()},
+            method='default',
+            probabilities=self._classify(query, analysis)
+        )
+        
+        predicted_agent = self._confident_prediction(decision.probabilities, tables)
+        if predicted_agent:
+            decision.agent_id = predicted_agent
+            decision.method = 'classifier'
+            decision.margin = self._margin(decision.probabilities)
+        else:
+            selected_agent = self._select_agent(query, agent_scores)
+            if selected_agent != 'coordinator':
+                decision.agent_id = selected_agent
+                decision.method = 'keyword'
+                decision.margin = self._margin(agent_scores)
+            
+            # Weak or ambiguous queries stick with the session's recent specialist
+            sticky_agent, sticky_scores = self._sticky_agent(agent_scores, history)
+            if sticky_agent and sticky_agent != decision.agent_id:
+                decision.agent_id = sticky_agent
+                decision.method = 'sticky'
+                decision.sticky = True
+                decision.margin = self._margin(sticky_scores)
+                self.logger.debug(f"Query '{query[:50]}...' kept on {sticky_agent} (session stickiness)")
+        
+        # Confident specialist picks skip the coordinator's extra handoff turn
+        if decision.agent_id != 'coordinator' and decision.margin >= self.confidence_threshold:
+            decision.dispatch = 'direct'
+        
+        self._record_decision(decision)
+        return decision
+    
+    @staticmethod
+    def _margin(scores: Optional[Dict[str, float]]) -> float:
+        """Get the leader's relative margin over the runner-up"""
+        ranked = sorted((scores or {}).values(), reverse=True)
+        if not ranked or ranked[0] <= 0:
+            return 0.0
+        runner_up = ranked[1] if len(ranked) > 1 else 0
+        return (ranked[0] - runner_up) / ranked[0]
+    
+    def _sticky_agent(self, agent_scores: Dict[str, float],
+                      history: Optional[List[str]]) -> Tuple[Optional[str], Dict[str, float]]:
+        """Get the specialist favoured by recent routing history, plus the boosted scores"""
+        if not history or self.sticky_threshold <= 0:
+            return None, agent_scores
+        
+        ranked = sorted(agent_scores.values(), reverse=True)
+        best_score = ranked[0] if ranked else 0
+        ambiguous = len(ranked) > 1 and best_score > 0 and ranked[0] == ranked[1]
+        if best_score >= self.sticky_threshold and not ambiguous:
+            return None, agent_scores
+        
+        # Ambiguous queries only break the tie; weak queries may move to any recent specialist
+        if ambiguous:
+            candidates = [agent_id for agent_id, score in agent_scores.items() if score == best_score]
+        else:
+            candidates = list(agent_scores)
+        
+        # Recent specialists earn a bonus that decays with every turn since they were used
+        bonus: Dict[str, float] = {}
+        for turns_ago, agent_id in enumerate(reversed(history)):
+            if agent_id in candidates:
+                bonus[agent_id] = bonus.get(agent_id, 0) + self.sticky_decay ** turns_ago
+        
+        if not bonus:
+            return None, agent_scores
+        
+        boosted = {agent_id: agent_scores[agent_id] + bonus.get(agent_id, 0) for agent_id in candidates}
+        sticky_agent = max(candidates, key=lambda agent_id: (boosted[agent_id], bonus.get(agent_id, 0)))
+        return sticky_agent, boosted
+    
+    def _record_decision(self, decision: RoutingDecision):
+        """Count routing outcomes for monitoring"""
+        with self._stats_lock:
+            self.routing_stats['routed'] += 1
+            self.routing_stats[decision.method] += 1
+            self.routing_stats[f"dispatch_{decision.dispatch}"] += 1
+    
+    def route_query(self, query: str, history: Optional[List[str]] = None,
+                    analysis: Optional[Any] = None) -> str:
+        """Route query to appropriate agent based on content"""
+        return self.route(query, history, analysis).agent_id
+    
+    def _select_agent(self, query: str, agent_scores: Dict[str, float]) -> str:
+        """Select the best agent from per-agent relevance scores"""
         # Route to agent with highest score
-        if agent_scores:
-            best_agent = max(agent_scores, key=agent_scores.get)
+        best_agent = max(agent_scores, key=agent_scores.get, default=None)
+        if best_agent and agent_scores[best_agent] > 0:
             self.logger.debug(f"Query '{query[:50]}...' routed to {best_agent} (score: {agent_scores[best_agent]})")
             return best_agent
         
@@ -58,34 +283,123 @@ class QueryRouter:
         self.logger.debug(f"Query '{query[:50]}...' routed to coordinator (no specific match)")
         return 'coordinator'
     
-    def get_routing_explanation(self, query: str) -> Dict[str, any]:
+    def get_routing_explanation(self, query: str, history: Optional[List[str]] = None,
+                                analysis: Optional[Any] = None) -> Dict[str, any]:
         """Get detailed explanation of routing decision"""
-        query_lower = query.lower()
+        decision = self.route(query, history, analysis)
         
         agent_details = {}
-        for agent_id, keywords in self.agent_keywords.items():
-            matched_keywords = [kw for kw in keywords if kw in query_lower]
+        for agent_id, matched_keywords in decision.matched_keywords.items():
             agent_details[agent_id] = {
-                'score': len(matched_keywords),
+                'score': decision.agent_scores[agent_id],
                 'matched_keywords': matched_keywords
             }
         
-        selected_agent = self.route_query(query)
+        selected_agent = decision.agent_id
+        if decision.method == 'classifier':
+            reasoning = f"Selected {selected_agent} based on routing classifier (p={decision.probabilities[selected_agent]:.2f})"
+        elif decision.method == 'sticky':
+            reasoning = f"Selected {selected_agent} based on recent session routing (query was weak or ambiguous)"
+        else:
+            reasoning = f"Selected {selected_agent} based on keyword matching"
         
-        return {
+        explanation = {
             'selected_agent': selected_agent,
             'agent_scores': agent_details,
-            'reasoning': f"Selected {selected_agent} based on keyword matching"
+            'reasoning': reasoning,
+            'sticky': decision.sticky,
+            'margin': decision.margin,
+            'dispatch': decision.dispatch
         }
+        if decision.probabilities is not None:
+            explanation['classifier_probabilities'] = decision.probabilities
+        
+        return explanation
+    
+    def route_many(self, queries: Iterable[str], chunk_size: int = 10000) -> List[Dict[str, Any]]:
+        """Route many queries at once with a vectorized term-weight matrix"""
+        tables = self._tables
+        batch_router = self._batch_router
+        if batch_router is None or batch_router.index is not tables.index:
+            from .batch_routing import BatchRouter
+            batch_router = BatchRouter(tables.index, tables.agent_keywords)
+            self._batch_router = batch_router
+        
+        results = []
+        chunk = []
+        for query in queries:
+            chunk.append(query)
+            if len(chunk) >= chunk_size:
+                results.extend(self._route_chunk(chunk, batch_router, tables))
+                chunk = []
+        
+        if chunk:
+            results.extend(self._route_chunk(chunk, batch_router, tables))
+        
+        return results
+    
+    def _route_chunk(self, queries: List[str], batch_router: Any,
+                     tables: RoutingTables) -> List[Dict[str, Any]]:
+        """Route one chunk of queries, letting a loaded classifier override keywords"""
+        results = batch_router.route(queries)
+        if self.classifier is None or not results:
+            return results
+        
+        probability_matrix = self.classifier.predict_proba_many(queries)
+        for result, row in zip(results, probability_matrix.tolist()):
+            probabilities = dict(zip(self.classifier.labels, row))
+            predicted_agent = self._confident_prediction(probabilities, tables)
+            if predicted_agent:
+                result['selected_agent'] = predicted_agent
+            result['classifier_probabilities'] = probabilities
+        
+        return results
+    
+    def _swap_tables(self, agent_keywords: Mapping[str, Iterable[str]]):
+        """Build a new snapshot and atomically replace the current one (caller holds the update lock)"""
+        self._tables = RoutingTables.build(agent_keywords, version=self._tables.version + 1)
+        
+        # Entries are keyed by version, so clearing only frees memory early
+        self.cache.clear()
     
     def add_custom_keywords(self, agent_id: str, keywords: List[str]):
         """Add custom keywords for an agent"""
-        if agent_id in self.agent_keywords:
-            self.agent_keywords[agent_id].extend(keywords)
-            self.logger.info(f"Added {len(keywords)} custom keywords to {agent_id}")
-        else:
-            self.logger.warning(f"Unknown agent_id: {agent_id}")
+        with self._update_lock:
+            current = self._tables.agent_keywords
+            if agent_id not in current:
+                self.logger.warning(f"Unknown agent_id: {agent_id}")
+                return
+            
+            updated = dict(current)
+            updated[agent_id] = current[agent_id] + tuple(keywords)
+            self._swap_tables(updated)
+        
+        self.logger.info(f"Added {len(keywords)} custom keywords to {agent_id}")
+    
+    def update_keywords(self, agent_keywords: Mapping[str, Iterable[str]]):
+        """Replace keyword tables for the given agents"""
+        with self._update_lock:
+            updated = dict(self._tables.agent_keywords)
+            updated.update(agent_keywords)
+            self._swap_tables(updated)
+        
+        self.logger.info(f"Routing tables updated to version {self._tables.version}")
+    
+    def reload_from_file(self, path: str):
+        """Reload agent keywords from the 'routing' section of a YAML or JSON file"""
+        section = load_table_file(path).get('routing') or {}
+        if section:
+            self.update_keywords(section)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get routing cache hit-rate statistics"""
+        return self.cache.get_stats()
+    
+    def get_routing_stats(self) -> Dict[str, int]:
+        """Get counts of routing outcomes by method"""
+        with self._stats_lock:
+            return dict(self.routing_stats)
     
     def get_agent_keywords(self, agent_id: str) -> List[str]:
         """Get keywords for a specific agent"""
-        return self.agent_keywords.get(agent_id, [])
\ No newline at end of file
+        return list(self._tables.agent_keywords.get(agent_id, ()))
\ No newline at end of file
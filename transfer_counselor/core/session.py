@@ -59,9 +59,9 @@ class SessionManager:
             self.logger.error(f"Failed to initialize session database: {e}")
             self.persistent = False
     
-    def create_session(self, user_id: Optional[str] = None) -> str:
+    def create_session(self, user_id: Optional[str] = None, session_id: Optional[str] = None) -> str:
         """Create a new session"""
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
         now = datetime.now()
         
         session = SessionContext(
@@ -8,17 +8,39 @@ session persistence, tracing, and error handling for UC/CSU transfer guidance.
 
 import os
 import sys
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, AsyncIterator, Iterator, Optional
 from datetime import datetime
 
 from ..utils.config import ConfigManager
-from ..utils.error_handling import ErrorHandler, with_retry, RetryConfig
-from ..utils.guardrails import TransferGuardrails
+from ..utils.error_handling import ErrorHandler, with_async_retry, RetryConfig
+from ..utils.guardrails import TransferGuardrails, OutputGuardrails
+from ..utils.tables import TableFileWatcher
+from ..utils.fallback_responses import FallbackResponseEngine
+from ..utils.response_cache import ResponseCache
+from ..utils.semantic_cache import SemanticResponseCache
 from ..agents.manager import AgentManager
 from .session import SessionManager
 from .tracing import TracingManager
 from .routing import QueryRouter
+from .analysis import QueryAnalyzer
+
+
+def _iterate_async(stream: AsyncIterator[Any]) -> Iterator[Any]:
+    """Drive an async generator from synchronous code on a private event loop"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(stream.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        # Closing early runs the generator's cleanup on the same loop
+        loop.run_until_complete(stream.aclose())
+        loop.close()
 
 
 class EnhancedTransferCounselorSystem:
@@ -36,13 +58,53 @@ class EnhancedTransferCounselorSystem:
         )
         self.tracer = TracingManager()
         self.error_handler = ErrorHandler()
-        self.guardrails = TransferGuardrails()
-        self.query_router = QueryRouter()
+        self.guardrails = TransferGuardrails(cache_size=self.config.guardrail_cache_size)
+        self.output_guardrails = OutputGuardrails()
+        # Background agent runs for progressive responses
+        self._progressive_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="progressive-agent")
+        self.query_router = QueryRouter(
+            cache_size=self.config.routing_cache_size,
+            classifier_threshold=self.config.routing_classifier_threshold,
+            sticky_decay=self.config.routing_sticky_decay,
+            sticky_threshold=self.config.routing_sticky_threshold,
+            confidence_threshold=self.config.routing_confidence_threshold
+        )
+        self.fallback_engine = FallbackResponseEngine(self.config.fallback_responses_file)
+        self.query_analyzer = QueryAnalyzer(
+            self.query_router, self.guardrails, cache_size=self.config.routing_cache_size,
+            fallback_engine=self.fallback_engine
+        )
         self.logger = logging.getLogger(__name__)
         
+        # Load the optional routing classifier; keyword routing remains the fallback
+        if self.config.routing_model_path:
+            try:
+                self.query_router.load_classifier(self.config.routing_model_path)
+            except Exception as e:
+                self.logger.warning(f"Could not load routing classifier, using keyword routing: {e}")
+        
+        # Load editable routing and guardrail tables, optionally watching for edits
+        self.tables_watcher = None
+        if self.config.tables_file:
+            try:
+                self.reload_tables()
+            except Exception as e:
+                self.logger.warning(f"Could not load tables from {self.config.tables_file}: {e}")
+            
+            if self.config.tables_reload_interval > 0:
+                self.tables_watcher = TableFileWatcher(
+                    self.config.tables_file,
+                    self.reload_tables,
+                    interval=self.config.tables_reload_interval
+                )
+                self.tables_watcher.start()
+        
         # Initialize agent management system
         try:
-            self.agent_manager = AgentManager()
+            self.agent_manager = AgentManager(
+                response_cache=self._create_response_cache(),
+                semantic_cache=self._create_semantic_cache()
+            )
             self.agents = self.agent_manager.get_agents()
         except Exception as e:
             # Fall back to basic agent structure if initialization fails
@@ -105,10 +167,23 @@ class EnhancedTransferCounselorSystem:
         print("  🎯 Coordinator - Intelligent routing and multi-agent coordination")
         print("-" * 70)
     
-    @with_retry(RetryConfig(max_attempts=2, initial_delay=0.5))
     def process_query(self, student_query: str, session_id: Optional[str] = None, 
                      student_context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process a student query through the enhanced agent system"""
+        return asyncio.run(self.process_query_async(student_query, session_id, student_context))
+    
+    @with_async_retry(RetryConfig(max_attempts=2, initial_delay=0.5))
+    async def process_query_async(self, student_query: str, session_id: Optional[str] = None,
+                                  student_context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Process a student query without blocking the event loop, so many conversations can share one loop"""
+        # Analyze the query once; guardrails, routing and fallback selection share the result
+        analysis = self.query_analyzer.analyze(student_query)
+        
+        # Reject off-topic and blocked queries before any session write or model call
+        rejection = self._check_guardrails(student_query, session_id, analysis)
+        if rejection:
+            return rejection
+        
         # Create or get session
         if session_id is None:
             session_id = self.create_session()
@@ -117,75 +192,389 @@ class EnhancedTransferCounselorSystem:
         messages = [
             {"role": "user", "content": student_query}
         ]
+        agent_to_use = None
         
         try:
             # Process through agents
             span_id = self.tracer.trace_session_start(session_id)
             
-            # Determine which agent to use based on query content
-            agent_to_use = self.query_router.route_query(student_query)
+            routing_decision = self._route_query(student_query, session_id, analysis)
+            agent_to_use = routing_decision.target_agent
             
             # Try to use OpenAI API with agents
-            api_key = os.getenv('OPENAI_API_KEY')
-            
-            if api_key and api_key.startswith('sk-') and self.agent_manager:
+            agent_metadata = {}
+            if self._agents_available():
                 try:
-                    response_content = self.agent_manager.process_with_agent(
-                        agent_to_use, student_query, session_id
+                    # Session-specific context makes the answer unsafe to share through the cache
+                    agent_result = await self._run_agent_async(
+                        agent_to_use, student_query, session_id, use_cache=not student_context
                     )
-                    self.logger.info(f"Generated AI response using {agent_to_use} agent")
-                        
+                    response_content = agent_result['response']
+                    agent_metadata = self._agent_cache_metadata(agent_result)
                 except Exception as e:
                     self.logger.warning(f"OpenAI Agents API call failed: {e}")
-                    response_content = self._generate_fallback_response(student_query, agent_to_use)
+                    response_content = self._generate_fallback_response(student_query, agent_to_use, analysis)
             else:
                 # Use fallback response when API key is not available
-                response_content = self._generate_fallback_response(student_query, agent_to_use)
-                if not api_key:
-                    self.logger.info(f"Using fallback response (no API key set) for {agent_to_use}")
-                else:
-                    self.logger.info(f"Using fallback response (invalid API key format) for {agent_to_use}")
+                response_content = self._generate_fallback_response(student_query, agent_to_use, analysis)
             
             self.tracer.trace_session_end(session_id, span_id)
             
-            return {
-                'response': response_content,
-                'agent_used': agent_to_use,
-                'session_id': session_id,
-                'status': 'success',
-                'metadata': {'agent_capabilities': self._get_agent_capabilities(agent_to_use)},
-                'timestamp': datetime.now().isoformat()
-            }
+            response = self._build_response(response_content, agent_to_use, session_id, routing_decision)
+            response['metadata'].update(agent_metadata)
+            return response
             
         except Exception as e:
-            error_context = self.error_handler.handle_error(e, {
-                'component': 'query_processing',
-                'operation': 'process_query',
-                'session_id': session_id,
-                'query': student_query
-            })
+            return self._error_response(e, student_query, session_id, agent_to_use, analysis)
+    
+    def process_query_progressive(self, student_query: str, session_id: Optional[str] = None,
+                                  deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the fallback answer immediately, then the agent's answer if it arrives before the deadline
+        
+        Every yielded result carries 'phase' ('provisional' or 'final'); the
+        last one is always final. Rejected queries and runs without agents
+        yield a single final result.
+        """
+        deadline = self.config.progressive_deadline if deadline is None else deadline
+        analysis = self.query_analyzer.analyze(student_query)
+        
+        rejection = self._check_guardrails(student_query, session_id, analysis)
+        if rejection:
+            yield {**rejection, 'phase': 'final'}
+            return
+        
+        if session_id is None:
+            session_id = self.create_session()
+        agent_to_use = None
+        
+        try:
+            span_id = self.tracer.trace_session_start(session_id)
+            routing_decision = self._route_query(student_query, session_id, analysis)
+            agent_to_use = routing_decision.target_agent
+            provisional_content = self._generate_fallback_response(student_query, agent_to_use, analysis)
             
-            # Use fallback response
-            agent_to_use = self.query_router.route_query(student_query)
-            fallback_response = self._generate_fallback_response(student_query, agent_to_use)
+            if not self._agents_available():
+                self.tracer.trace_session_end(session_id, span_id)
+                yield {**self._build_response(provisional_content, agent_to_use, session_id, routing_decision),
+                       'phase': 'final'}
+                return
             
-            return {
-                'response': fallback_response,
-                'agent_used': agent_to_use,
-                'session_id': session_id,
-                'status': 'fallback',
-                'error_id': error_context.error_id,
-                'timestamp': datetime.now().isoformat()
-            }
+            # Start the agent before handing the provisional answer to the caller
+            future = self._progressive_executor.submit(self._run_agent, agent_to_use, student_query, session_id)
+            yield {**self._build_response(provisional_content, agent_to_use, session_id, routing_decision,
+                                          status='provisional'),
+                   'phase': 'provisional'}
+            
+            try:
+                agent_result = future.result(timeout=deadline)
+                final = self._build_response(agent_result['response'], agent_to_use, session_id, routing_decision)
+                final['metadata']['upgraded'] = True
+                final['metadata'].update(self._agent_cache_metadata(agent_result))
+            except FutureTimeoutError:
+                # The late answer is dropped; the provisional answer stands
+                self.logger.warning(f"Agent {agent_to_use} missed the {deadline}s progressive deadline")
+                final = self._build_response(provisional_content, agent_to_use, session_id, routing_decision,
+                                             status='fallback')
+                final['metadata']['deadline_missed'] = True
+            except Exception as e:
+                self.logger.warning(f"OpenAI Agents API call failed: {e}")
+                final = self._build_response(provisional_content, agent_to_use, session_id, routing_decision,
+                                             status='fallback')
+            
+            self.tracer.trace_session_end(session_id, span_id)
+            yield {**final, 'phase': 'final'}
+            
+        except Exception as e:
+            yield {**self._error_response(e, student_query, session_id, agent_to_use, analysis), 'phase': 'final'}
+    
+    def process_query_stream(self, student_query: str, session_id: Optional[str] = None,
+                             student_context: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """Yield response text as it is generated, then one final event with the full result"""
+        return _iterate_async(self.process_query_stream_async(student_query, session_id, student_context))
+    
+    async def process_query_stream_async(self, student_query: str, session_id: Optional[str] = None,
+                                         student_context: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield {'type': 'delta', 'text'} events as text is generated, then one {'type': 'final'} event
+        
+        The final event carries the result process_query would return, with
+        the complete streamed text as its response. Output guardrails run on
+        the text as it arrives. If the agent fails mid-stream, the fallback
+        answer is appended to what was already sent.
+        """
+        analysis = self.query_analyzer.analyze(student_query)
+        
+        rejection = self._check_guardrails(student_query, session_id, analysis)
+        if rejection:
+            yield {'type': 'delta', 'text': rejection['response']}
+            yield {'type': 'final', **rejection}
+            return
+        
+        if session_id is None:
+            session_id = self.create_session()
+        agent_to_use = None
+        span_id = None
+        sent = []
+        completed = False
+        
+        try:
+            span_id = self.tracer.trace_session_start(session_id)
+            routing_decision = self._route_query(student_query, session_id, analysis)
+            agent_to_use = routing_decision.target_agent
+            
+            status = 'success'
+            agent_result: Dict[str, Any] = {}
+            if self._agents_available():
+                try:
+                    stream = self._stream_agent(
+                        agent_to_use, student_query, session_id, not student_context, agent_result
+                    )
+                    try:
+                        async for text in stream:
+                            sent.append(text)
+                            yield {'type': 'delta', 'text': text}
+                    finally:
+                        await stream.aclose()
+                except Exception as e:
+                    self.logger.warning(f"OpenAI Agents API streaming failed: {e}")
+                    status = 'fallback'
+                    fallback = self._generate_fallback_response(student_query, agent_to_use, analysis)
+                    text = f"\n\n{fallback}" if sent else fallback
+                    sent.append(text)
+                    yield {'type': 'delta', 'text': text}
+            else:
+                text = self._generate_fallback_response(student_query, agent_to_use, analysis)
+                sent.append(text)
+                yield {'type': 'delta', 'text': text}
+            
+            response = self._build_response(''.join(sent), agent_to_use, session_id, routing_decision, status=status)
+            if 'cache' in agent_result:
+                response['metadata'].update(self._agent_cache_metadata(agent_result))
+            if 'output_guardrail' in agent_result:
+                response['metadata']['output_guardrail'] = agent_result['output_guardrail']
+            response['metadata']['streamed'] = True
+            completed = True
+            yield {'type': 'final', **response}
+            
+        except Exception as e:
+            error = self._error_response(e, student_query, session_id, agent_to_use, analysis)
+            text = f"\n\n{error['response']}" if sent else error['response']
+            sent.append(text)
+            completed = True
+            yield {'type': 'delta', 'text': text}
+            yield {'type': 'final', **error, 'response': ''.join(sent)}
+        finally:
+            # Record the full text sent, including when the caller stopped reading early
+            if span_id is not None:
+                self.tracer.trace_session_end(session_id, span_id, {
+                    'streamed': True,
+                    'aborted': not completed,
+                    'response_chars': sum(len(text) for text in sent)
+                })
+    
+    async def _stream_agent(self, agent_id: str, student_query: str, session_id: str, use_cache: bool,
+                            agent_result: Dict[str, Any]) -> AsyncIterator[str]:
+        """Stream an agent's text through the output guardrails, filling agent_result from the final event"""
+        scanner = self.output_guardrails.scanner() if self.config.enable_guardrails else None
+        events = self.agent_manager.stream_with_agent(agent_id, student_query, session_id, use_cache)
+        try:
+            async for event in events:
+                if event['type'] == 'done':
+                    agent_result.update(event)
+                    continue
+                text = scanner.feed(event['text']) if scanner else event['text']
+                if text:
+                    yield text
+                if scanner and scanner.blocked:
+                    break
+        finally:
+            # Stops the agent run when the guardrails or the caller cut the stream short
+            await events.aclose()
+        
+        if scanner is None:
+            return
+        if not scanner.blocked:
+            text = scanner.close()
+            if text:
+                yield text
+        if scanner.blocked:
+            category = scanner.verdict['category']
+            self.logger.warning(f"Agent response stream stopped by output guardrails ({category})")
+            agent_result['output_guardrail'] = category
+            yield self.output_guardrails.get_redirect_message(category)
+        else:
+            self.logger.info(f"Streamed AI response using {agent_id} agent (cache: {agent_result.get('cache')})")
+    
+    def _check_guardrails(self, student_query: str, session_id: Optional[str],
+                          analysis: Any) -> Optional[Dict[str, Any]]:
+        """Get the short-circuit response for a rejected query, or None when it may proceed"""
+        if not self.config.enable_guardrails:
+            return None
+        verdict = self.guardrails.is_query_allowed(student_query, analysis)
+        if verdict['allowed']:
+            return None
+        return self._guardrail_response(verdict, session_id)
+    
+    def _route_query(self, student_query: str, session_id: str, analysis: Any):
+        """Route a query using its content and the session's recent routing, and record the choice"""
+        routing_decision = self.query_router.route(
+            student_query, history=self._get_routing_history(session_id), analysis=analysis
+        )
+        # Confident decisions go straight to the specialist; mixed queries go through the coordinator
+        self._record_routing(session_id, routing_decision.target_agent)
+        return routing_decision
+    
+    def _agents_available(self) -> bool:
+        """Check whether agent calls can be made, logging why when they cannot"""
+        api_key = os.getenv('OPENAI_API_KEY')
+        if api_key and api_key.startswith('sk-') and self.agent_manager:
+            return True
+        
+        if not api_key:
+            self.logger.info("Using fallback response (no API key set)")
+        else:
+            self.logger.info("Using fallback response (invalid API key format)")
+        return False
+    
+    def _run_agent(self, agent_id: str, student_query: str, session_id: str,
+                   use_cache: bool = True) -> Dict[str, Any]:
+        """Run an agent and apply output guardrails to its response"""
+        return asyncio.run(self._run_agent_async(agent_id, student_query, session_id, use_cache))
+    
+    async def _run_agent_async(self, agent_id: str, student_query: str, session_id: str,
+                               use_cache: bool = True) -> Dict[str, Any]:
+        """Run an agent on the async runner and apply output guardrails to its response"""
+        result = await self.agent_manager.process_with_agent_result_async(
+            agent_id, student_query, session_id, use_cache
+        )
+        self.logger.info(f"Generated AI response using {agent_id} agent (cache: {result['cache']})")
+        
+        # Replace responses that drifted into medical, legal or investment advice
+        if self.config.enable_guardrails:
+            output_verdict = self.output_guardrails.check_response(result['response'])
+            if not output_verdict['allowed']:
+                self.logger.warning(f"Agent response blocked by output guardrails ({output_verdict['category']})")
+                result['response'] = self.output_guardrails.get_redirect_message(output_verdict['category']).strip()
+        return result
+    
+    @staticmethod
+    def _agent_cache_metadata(agent_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Get response metadata describing how the cache tiers handled an agent call"""
+        metadata = {'response_cache': agent_result['cache']}
+        if 'similarity' in agent_result:
+            metadata['semantic_similarity'] = agent_result['similarity']
+        return metadata
+    
+    def _create_semantic_cache(self) -> Optional[SemanticResponseCache]:
+        """Build the near-duplicate response cache from configuration"""
+        if not self.config.semantic_cache_enabled:
+            return None
+        return SemanticResponseCache(
+            capacity=self.config.semantic_cache_capacity,
+            dim=self.config.semantic_cache_dim,
+            threshold=self.config.semantic_cache_threshold,
+            agent_thresholds=self.config.semantic_cache_agent_thresholds,
+            ttl=self.config.response_cache_ttl
+        )
+    
+    def _create_response_cache(self) -> Optional[ResponseCache]:
+        """Build the agent response cache from configuration"""
+        if not self.config.response_cache_enabled:
+            return None
+        return ResponseCache(
+            maxsize=self.config.response_cache_size,
+            default_ttl=self.config.response_cache_ttl,
+            agent_ttls=self.config.response_cache_agent_ttls,
+            db_path=self.config.response_cache_db_path
+        )
+    
+    def _build_response(self, response_content: str, agent_id: str, session_id: str,
+                        routing_decision: Any, status: str = 'success') -> Dict[str, Any]:
+        """Build the result dictionary for a routed query"""
+        return {
+            'response': response_content,
+            'agent_used': agent_id,
+            'session_id': session_id,
+            'status': status,
+            'metadata': {
+                'agent_capabilities': self._get_agent_capabilities(agent_id),
+                'routing': routing_decision.to_metadata()
+            },
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _error_response(self, error: Exception, student_query: str, session_id: str,
+                        agent_to_use: Optional[str], analysis: Any) -> Dict[str, Any]:
+        """Record a processing error and answer with a fallback response"""
+        error_context = self.error_handler.handle_error(error, {
+            'component': 'query_processing',
+            'operation': 'process_query',
+            'session_id': session_id,
+            'query': student_query
+        })
+        
+        # Use fallback response, reusing the routing decision when one was made
+        if agent_to_use is None:
+            agent_to_use = self.query_router.route_query(student_query, analysis=analysis)
+        fallback_response = self._generate_fallback_response(student_query, agent_to_use, analysis)
+        
+        return {
+            'response': fallback_response,
+            'agent_used': agent_to_use,
+            'session_id': session_id,
+            'status': 'fallback',
+            'error_id': error_context.error_id,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _guardrail_response(self, verdict: Dict[str, Any], session_id: Optional[str]) -> Dict[str, Any]:
+        """Build the short-circuit response for a query rejected by guardrails"""
+        self.logger.info(f"Query rejected by guardrails ({verdict['category']})")
+        return {
+            'response': self.guardrails.get_redirect_message(verdict['category']),
+            'agent_used': 'guardrails',
+            'session_id': session_id,
+            'status': 'guardrail_rejected',
+            'metadata': {
+                'guardrail': verdict
+            },
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def reload_tables(self, path: Optional[str] = None):
+        """Reload routing, guardrail and fallback tables from disk without pausing requests"""
+        path = path or self.config.tables_file
+        self.query_router.reload_from_file(path)
+        self.guardrails.reload_from_file(path)
+        self.output_guardrails.reload_from_file(path)
+        self.fallback_engine.reload()
     
     def create_session(self, user_id: Optional[str] = None) -> str:
         """Create a new session"""
         if self.agent_manager:
-            return self.agent_manager.create_session(user_id)
+            session_id = self.agent_manager.create_session(user_id)
         else:
             # Fallback session creation
             import uuid
-            return str(uuid.uuid4())
+            session_id = str(uuid.uuid4())
+        
+        # Track routing history and context under the same id
+        self.session_manager.create_session(user_id, session_id=session_id)
+        return session_id
+    
+    def _get_routing_history(self, session_id: str) -> list:
+        """Get agents recently used in a session, oldest first"""
+        session = self.session_manager.get_session(session_id)
+        return list(session.active_agents) if session else []
+    
+    def _record_routing(self, session_id: str, agent_id: str):
+        """Append a routed agent to the session's bounded routing history"""
+        session = self.session_manager.get_session(session_id)
+        if session is None:
+            self.session_manager.create_session(session_id=session_id)
+            session = self.session_manager.get_session(session_id)
+        
+        history = (session.active_agents + [agent_id])[-self.config.routing_history_size:]
+        self.session_manager.update_session(session_id, active_agents=history)
     
     def _get_agent_capabilities(self, agent_id: str) -> list:
         """Get capabilities for an agent"""
@@ -197,11 +586,10 @@ class EnhancedTransferCounselorSystem:
         }
         return capabilities_map.get(agent_id, [])
     
-    def _generate_fallback_response(self, user_message: str, agent_id: str) -> str:
+    def _generate_fallback_response(self, user_message: str, agent_id: str,
+                                    analysis: Optional[Any] = None) -> str:
         """Generate appropriate fallback responses based on agent type and query"""
-        # Import the fallback responses from a dedicated module
-        from ..utils.fallback_responses import get_fallback_response
-        return get_fallback_response(user_message, agent_id)
+        return self.fallback_engine.get_response(user_message, agent_id, analysis)
     
     def interactive_session(self, user_id: Optional[str] = None):
         """Run enhanced interactive counseling session with full tracing"""
@@ -223,6 +611,30 @@ class EnhancedTransferCounselorSystem:
         for agent_id in self.agents:
             print(f"   - {agent_id}")
         
+        # Query analysis cache statistics (shared by routing and fallback selection)
+        cache_stats = self.query_analyzer.get_cache_stats()
+        print(f"\n🧭 Query analysis cache: {cache_stats['size']}/{cache_stats['maxsize']} entries, "
+              f"hit rate {cache_stats['hit_rate']:.1%} ({cache_stats['hits']} hits, "
+              f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions)")
+        routing_stats = self.query_router.get_routing_stats()
+        print(f"   Routed: {routing_stats.get('routed', 0)}, "
+              f"sticky: {routing_stats.get('sticky', 0)}, "
+              f"direct: {routing_stats.get('dispatch_direct', 0)}, "
+              f"via coordinator: {routing_stats.get('dispatch_coordinator', 0)}")
+        if self.agent_manager and self.agent_manager.response_cache:
+            response_stats = self.agent_manager.response_cache.get_stats()
+            print(f"💾 Response cache: {response_stats['memory_size']}/{response_stats['maxsize']} entries, "
+                  f"hit rate {response_stats['hit_rate']:.1%} ({response_stats['memory_hits']} memory, "
+                  f"{response_stats['disk_hits']} disk, {response_stats['misses']} misses, "
+                  f"{response_stats['bypassed']} bypassed)")
+        if self.agent_manager and self.agent_manager.semantic_cache:
+            semantic_stats = self.agent_manager.semantic_cache.get_stats()
+            print(f"🧠 Semantic cache: {semantic_stats['size']}/{semantic_stats['capacity']} entries, "
+                  f"hit rate {semantic_stats['hit_rate']:.1%} ({semantic_stats['evictions']} evictions)")
+        guardrail_stats = self.guardrails.get_cache_stats()
+        print(f"🛡️  Guardrail verdict cache: {guardrail_stats['size']}/{guardrail_stats['maxsize']} entries, "
+              f"hit rate {guardrail_stats['hit_rate']:.1%}")
+        
         # Error statistics
         error_stats = self.error_handler.get_error_statistics(24)
         print(f"\n🚨 Errors (24h): {error_stats['total_errors']}")
@@ -39,14 +39,14 @@ class TracingManager:
         
         return span_id
     
-    def trace_session_end(self, session_id: str, span_id: str):
+    def trace_session_end(self, session_id: str, span_id: str, tags: Optional[Dict[str, Any]] = None):
         """End tracing a session"""
         trace_data = {
             "span_id": span_id,
             "operation_name": "session.start",
             "duration_ms": 1000.0,  # Placeholder
             "status": "completed",
-            "tags": {"session_id": session_id, "user_id": None}
+            "tags": {"session_id": session_id, "user_id": None, **(tags or {})}
         }
         
         self.logger.info(f"span_finished: {json.dumps(trace_data)}")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Agent Manager Tests
+
+Tests for agent execution, response caching and session memory in the agent manager.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from transfer_counselor.agents.manager import AgentManager
+from transfer_counselor.utils.response_cache import ResponseCache
+from transfer_counselor.utils.semantic_cache import SemanticResponseCache
+
+
+class CountingRunner:
+    """Stand-in for the SDK runner that counts model calls"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def run(self, agent, query, session=None):
+        self.calls += 1
+        return SimpleNamespace(final_output=f"{agent.name} answer #{self.calls}")
+
+
+def test_response_cache_serves_identical_questions():
+    """Test that normalized duplicate questions hit the cache and persist across restarts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "responses.db")
+        manager = AgentManager(api_key="", response_cache=ResponseCache(maxsize=8, db_path=db_path))
+        manager.runner = CountingRunner()
+        
+        first = manager.process_with_agent_result('financial_aid', "How do I apply for FAFSA?", "s1")
+        second = manager.process_with_agent_result('financial_aid', "how do I apply for fafsa", "s2")
+        assert first['cache'] == 'miss'
+        assert second == {'response': first['response'], 'cache': 'hit_memory'}
+        assert manager.runner.calls == 1
+        
+        # Another agent, or a request carrying session context, does not share the entry
+        assert manager.process_with_agent_result('coordinator', "How do I apply for FAFSA?", "s3")['cache'] == 'miss'
+        bypassed = manager.process_with_agent_result('financial_aid', "How do I apply for FAFSA?", "s4", use_cache=False)
+        assert bypassed['cache'] == 'bypass'
+        
+        # A fresh manager reads the SQLite tier
+        restarted = AgentManager(api_key="", response_cache=ResponseCache(maxsize=8, db_path=db_path))
+        restarted.runner = CountingRunner()
+        assert restarted.process_with_agent_result('financial_aid', "How do I apply for FAFSA?", "s5")['cache'] == 'hit_disk'
+        assert restarted.runner.calls == 0
+        assert restarted.response_cache.get_stats()['disk_hits'] == 1
+
+
+def test_response_cache_expires_per_agent_ttl():
+    """Test that entries expire after their agent's TTL"""
+    cache = ResponseCache(maxsize=8, default_ttl=60, agent_ttls={'career_counselor': 0})
+    
+    cache.put("key", 'career_counselor', "not stored")
+    assert cache.get("key") == (None, 'miss')
+    
+    cache.put("key", 'financial_aid', "stored")
+    assert cache.get("key") == ("stored", 'memory')
+    
+    cache.memory.put("key", ("stale", 0))
+    assert cache.get("key") == (None, 'miss')
+    assert cache.get_stats()['expired'] == 1
+
+
+
+def test_semantic_cache_serves_paraphrases():
+    """Test that paraphrased questions hit the semantic tier and different questions miss"""
+    manager = AgentManager(api_key="", semantic_cache=SemanticResponseCache(capacity=2, dim=256))
+    manager.runner = CountingRunner()
+    
+    first = manager.process_with_agent_result('coordinator', "How much is UC tuition?", "s1")
+    paraphrase = manager.process_with_agent_result('coordinator', "UC tuition cost?", "s2")
+    assert first['cache'] == 'miss'
+    assert paraphrase['cache'] == 'hit_semantic'
+    assert paraphrase['response'] == first['response']
+    assert paraphrase['similarity'] >= manager.semantic_cache.threshold
+    
+    different = manager.process_with_agent_result('coordinator', "How much is CSU tuition?", "s3")
+    assert different['cache'] == 'miss'
+    assert different['similarity'] < manager.semantic_cache.threshold
+    assert manager.runner.calls == 2
+    
+    # Reusing the UC answer makes the CSU entry the one evicted by a third store
+    assert manager.process_with_agent_result('coordinator', "UC tuition cost?", "s4")['cache'] == 'hit_semantic'
+    manager.process_with_agent_result('coordinator', "When are transfer applications due?", "s5")
+    stats = manager.semantic_cache.get_stats()
+    assert stats['size'] == 2 and stats['evictions'] == 1
+    assert manager.process_with_agent_result('coordinator', "UC tuition cost?", "s6")['cache'] == 'hit_semantic'
+    assert manager.process_with_agent_result('coordinator', "How much is CSU tuition?", "s7")['cache'] == 'miss'
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Query Routing Tests
+
+Tests for keyword matching and agent selection in the query router.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from transfer_counselor.core.analysis import QueryAnalyzer
+from transfer_counselor.core.audit import run_audit
+from transfer_counselor.core.classifier import RoutingClassifier
+from transfer_counselor.core.evaluation import run_evaluation
+from transfer_counselor.core.routing import QueryRouter
+from transfer_counselor.utils.fallback_responses import FallbackResponseEngine, get_fallback_response
+from transfer_counselor.utils.guardrails import OutputGuardrails, TransferGuardrails
+from transfer_counselor.utils.matching import KeywordAutomaton, tokenize
+
+
+def test_automaton_finds_overlapping_patterns():
+    """Test that the automaton reports every overlapping pattern occurrence"""
+    automaton = KeywordAutomaton((word, word) for word in ['he', 'she', 'hers', 'his'])
+    
+    assert sorted(automaton.find_payloads('ushers')) == ['he', 'hers', 'she']
+
+
+def test_keywords_match_on_token_boundaries():
+    """Test that short keywords no longer fire inside longer words"""
+    router = QueryRouter()
+    
+    assert router.route_query("My college said the homework was fine") == 'coordinator'
+    assert router.route_query("Which GE classes should I take?") == 'course_difficulty'
+
+
+def test_multi_word_keywords_match_as_phrases():
+    """Test that multi-word keywords match consecutive tokens only"""
+    router = QueryRouter()
+    
+    explanation = router.get_routing_explanation("Do I qualify for a Cal Grant?")
+    assert explanation['selected_agent'] == 'financial_aid'
+    assert 'cal grant' in explanation['agent_scores']['financial_aid']['matched_keywords']
+    
+    explanation = router.get_routing_explanation("Is division lower at CSU?")
+    assert 'lower division' not in explanation['agent_scores']['course_difficulty']['matched_keywords']
+
+
+def test_custom_keywords_rebuild_index():
+    """Test that added keywords take effect immediately"""
+    router = QueryRouter()
+    assert router.route_query("Tell me about ASSIST articulation") == 'coordinator'
+    
+    router.add_custom_keywords('course_difficulty', ['assist', 'articulation'])
+    assert router.route_query("Tell me about ASSIST articulation") == 'course_difficulty'
+
+
+def test_tokenize_normalizes_plurals():
+    """Test that simple plurals share a token with their singular form"""
+    assert tokenize("Grants, classes & campus") == ['grant', 'classe', 'campus']
+    assert tokenize("grant class") == ['grant', 'class']
+
+
+def test_route_many_matches_scalar_router():
+    """Test that batch routing agrees with the scalar router"""
+    router = QueryRouter()
+    router.add_custom_keywords('career_counselor', ['resume', 'resume'])
+    queries = [
+        "How much does UC cost?",
+        "Resume tips for a psychology major",
+        "What about the prerequisites?",
+        "",
+        "How much does UC cost?"
+    ]
+    
+    results = router.route_many(queries, chunk_size=2)
+    
+    assert len(results) == len(queries)
+    for query, result in zip(queries, results):
+        explanation = router.get_routing_explanation(query)
+        assert result['selected_agent'] == router.route_query(query)
+        assert result['agent_scores'] == {
+            agent_id: details['score'] for agent_id, details in explanation['agent_scores'].items()
+        }
+        assert result['matched_keywords'] == {
+            agent_id: details['matched_keywords'] for agent_id, details in explanation['agent_scores'].items()
+        }
+
+
+def test_routing_cache_normalizes_and_invalidates():
+    """Test that equivalent phrasings share a cache entry and keyword changes invalidate it"""
+    router = QueryRouter(cache_size=2)
+    
+    router.route_query("How much does UC cost?")
+    router.route_query("  how much does uc   COST ")
+    stats = router.get_cache_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    
+    router.route_query("FAFSA deadline")
+    router.route_query("Resume help")
+    assert router.get_cache_stats()['evictions'] == 1
+    
+    router.add_custom_keywords('career_counselor', ['resume'])
+    assert len(router.cache) == 0
+    assert router.route_query("Resume help") == 'career_counselor'
+
+
+def test_classifier_routing_with_keyword_fallback():
+    """Test classifier training, persistence and fallback to keyword routing"""
+    queries = [
+        "when is the fafsa due", "how do I pay for school", "cal grant eligibility",
+        "what should I study", "is calculus hard", "which classes first",
+        "jobs for psychology", "salary for engineers", "internship advice"
+    ] * 10
+    labels = (['financial_aid'] * 3 + ['course_difficulty'] * 3 + ['career_counselor'] * 3) * 10
+    model = RoutingClassifier(['financial_aid', 'course_difficulty', 'career_counselor']).fit(queries, labels)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = str(Path(tmp_dir) / 'router.npz')
+        model.save(model_path)
+        
+        router = QueryRouter(classifier_threshold=0.6)
+        router.load_classifier(model_path)
+    
+    probabilities = router.get_routing_explanation("how do I pay for school")['classifier_probabilities']
+    assert abs(sum(probabilities.values()) - 1.0) < 1e-6
+    assert router.route_query("how do I pay for school") == 'financial_aid'
+    
+    # Low-confidence predictions defer to the keyword router
+    router.classifier_threshold = 1.1
+    assert router.route_query("Tell me about tuition") == 'financial_aid'
+
+
+def test_tables_reload_from_file_swaps_snapshot():
+    """Test that reloading builds a new snapshot while held snapshots stay intact"""
+    router = QueryRouter()
+    guardrails = TransferGuardrails()
+    old_tables = router.tables
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tables_path = Path(tmp_dir) / 'tables.yaml'
+        tables_path.write_text(
+            "routing:\n"
+            "  career_counselor: [resume, career]\n"
+            "guardrails:\n"
+            "  blocked_topics: [video games]\n"
+        )
+        router.reload_from_file(str(tables_path))
+        guardrails.reload_from_file(str(tables_path))
+    
+    assert router.tables.version == old_tables.version + 1
+    assert router.route_query("Resume help") == 'career_counselor'
+    assert 'resume' not in old_tables.agent_keywords['career_counselor']
+    
+    assert guardrails.is_query_allowed("Are video games a good major?")['category'] == 'blocked'
+    assert guardrails.is_query_allowed("Is dating allowed at UC?")['allowed']
+
+
+def test_sticky_routing_prefers_recent_specialist():
+    """Test that weak follow-ups stay with the previous specialist"""
+    router = QueryRouter()
+    
+    decision = router.route("Can you tell me more?", history=['course_difficulty'])
+    assert decision.agent_id == 'course_difficulty'
+    assert decision.sticky and decision.method == 'sticky'
+    
+    # Clear keyword matches are not overridden
+    decision = router.route("What about FAFSA?", history=['course_difficulty'])
+    assert decision.agent_id == 'financial_aid' and not decision.sticky
+    
+    # Ties are broken towards the most recent specialist
+    decision = router.route("Costs for a psychology degree", history=['financial_aid', 'career_counselor'])
+    assert decision.agent_id == 'career_counselor' and decision.sticky
+    
+    assert router.route("Can you tell me more?").agent_id == 'coordinator'
+    assert router.get_routing_stats()['sticky'] == 2
+
+
+def test_confidence_margin_controls_dispatch():
+    """Test that confident decisions bypass the coordinator and mixed ones do not"""
+    router = QueryRouter(confidence_threshold=0.3)
+    
+    decision = router.route("I need a course roadmap for a math major")
+    assert decision.agent_id == 'course_difficulty'
+    assert abs(decision.margin - 2 / 3) < 1e-9
+    assert decision.dispatch == 'direct' and decision.target_agent == 'course_difficulty'
+    
+    decision = router.route("Costs for a psychology degree")
+    assert decision.margin == 0.0
+    assert decision.dispatch == 'coordinator' and decision.target_agent == 'coordinator'
+    assert decision.to_metadata()['dispatch'] == 'coordinator'
+
+
+def test_evaluation_harness_reports_metrics():
+    """Test the routing benchmark on the bundled labeled query set"""
+    dataset_path = str(Path(__file__).parent / 'data' / 'routing_queries.jsonl')
+    
+    report = run_evaluation(dataset_path, ['keyword', 'cached', 'batch'], surface='get_routing_explanation')
+    
+    runs = {run['router']: run for run in report['runs']}
+    assert runs['keyword']['count'] == 24
+    assert runs['keyword']['accuracy'] == runs['cached']['accuracy'] == runs['batch']['accuracy']
+    assert runs['keyword']['accuracy'] > 0.8
+    assert sum(sum(row.values()) for row in runs['keyword']['confusion_matrix'].values()) == 24
+    assert set(runs['keyword']['latency_us']) == {'mean', 'p50', 'p90', 'p99', 'max'}
+
+
+def test_shared_analysis_matches_standalone_checks():
+    """Test that guardrails, routing and fallbacks agree with and without a shared analysis"""
+    router = QueryRouter()
+    guardrails = TransferGuardrails()
+    analyzer = QueryAnalyzer(router, guardrails)
+    
+    queries = [
+        "How much does UC tuition cost?",
+        "Tell me about dating apps",
+        "I'm struggling with organic chemistry",
+        "What career paths fit a business major?",
+        "hello"
+    ]
+    for query in queries:
+        analysis = analyzer.analyze(query)
+        assert guardrails.is_query_allowed(query, analysis) == guardrails.is_query_allowed(query)
+        assert router.route_query(query, analysis=analysis) == router.route_query(query)
+        for agent_id in ['financial_aid', 'career_counselor', 'course_difficulty', 'coordinator']:
+            assert get_fallback_response(query, agent_id, analysis) == get_fallback_response(query, agent_id)
+    
+    # Table updates invalidate the compiled union index
+    router.add_custom_keywords('career_counselor', ['hello'])
+    assert router.route_query("hello", analysis=analyzer.analyze("hello")) == 'career_counselor'
+
+
+def test_guardrail_verdicts_are_cached_by_normalized_query():
+    """Test that guardrail verdicts are memoized and invalidated on topic updates"""
+    guardrails = TransferGuardrails(cache_size=8)
+    
+    assert guardrails.is_query_allowed("Tell me about dating!")['category'] == 'blocked'
+    assert guardrails.is_query_allowed("tell me about   DATING")['category'] == 'blocked'
+    assert guardrails.get_cache_stats()['hits'] == 1
+    
+    guardrails.update_topics(blocked_topics=['gambling'])
+    assert guardrails.is_query_allowed("Tell me about dating!")['category'] == 'off_topic'
+
+
+def test_process_query_short_circuits_rejected_queries():
+    """Test that rejected queries return a redirect without creating a session"""
+    from transfer_counselor.core.system import EnhancedTransferCounselorSystem
+    system = EnhancedTransferCounselorSystem()
+    session_count = len(system.agent_manager.sessions) if system.agent_manager else 0
+    
+    result = system.process_query("What do you think about cryptocurrency?")
+    
+    assert result['status'] == 'guardrail_rejected'
+    assert result['response'] == system.guardrails.get_redirect_message('blocked')
+    assert result['session_id'] is None
+    assert (len(system.agent_manager.sessions) if system.agent_manager else 0) == session_count
+
+
+def test_guardrail_audit_streams_verdicts_and_counts_topics():
+    """Test that the batch audit matches per-query verdicts in and out of a process pool"""
+    queries = ["How much is tuition?", "Any dating tips?", "hello", "Tell me about FAFSA"] * 5
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = Path(tmp) / "queries.jsonl"
+        log_path.write_text(''.join(json.dumps({'query': query}) + '\n' for query in queries))
+        
+        inline = run_audit(str(log_path), str(Path(tmp) / "inline.jsonl"), workers=1, chunk_size=3)
+        pooled = run_audit(str(log_path), str(Path(tmp) / "pooled.jsonl"), workers=2, chunk_size=3)
+        verdicts = [json.loads(line) for line in (Path(tmp) / "pooled.jsonl").read_text().splitlines()]
+    
+    guardrails = TransferGuardrails()
+    assert [verdict['category'] for verdict in verdicts] == [
+        guardrails.is_query_allowed(query)['category'] for query in queries
+    ]
+    assert inline['categories'] == pooled['categories']
+    assert pooled['total'] == len(queries)
+    assert pooled['blocked_topics']['dating'] == 5
+    assert 'gambling' in pooled['dead_entries']['blocked_topics']
+
+
+def test_output_guardrails_catch_phrases_split_across_chunks():
+    """Test that streamed responses stop before a blocked phrase split over chunks is emitted"""
+    guardrails = OutputGuardrails()
+    
+    chunks = ["Transfer early. Also, I'd suggest a pres", "crip", "tion for that."]
+    emitted = list(guardrails.filter_stream(chunks))
+    assert emitted[0] == "Transfer early. Also, I'd suggest a"
+    assert emitted[-1] == guardrails.get_redirect_message('medical')
+    
+    safe = "Apply to UC by November 30th. Good luck!"
+    assert ''.join(guardrails.filter_stream([safe[:7], safe[7:20], safe[20:]])) == safe
+    assert guardrails.check_response("Consider buying bitcoins")['category'] == 'investment'
+
+
+def test_fallback_templates_load_from_table_file():
+    """Test that fallback rules and templates come from a table file and reload without code changes"""
+    engine = FallbackResponseEngine()
+    assert engine.get_response("How much does UC cost?", 'financial_aid').startswith("For UC/CSU costs")
+    assert engine.get_response("hi", 'career_counselor').startswith("I can help with career guidance")
+    assert "Mystery Agent" in engine.get_response("hi", 'mystery_agent')
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        table_path = Path(tmp) / "fallbacks.yaml"
+        table_path.write_text(
+            "agents:\n"
+            "  financial_aid:\n"
+            "    rules:\n"
+            "      - name: housing\n"
+            "        keywords: [housing, dorm]\n"
+            "        response: Check campus housing portals early.\n"
+            "    default: Ask me about financial aid.\n"
+            "unknown_agent: No help for {agent_name}.\n"
+        )
+        engine.reload(str(table_path))
+    
+    assert engine.get_response("Are dorms expensive?", 'financial_aid') == "Check campus housing portals early."
+    assert engine.get_response("How much does UC cost?", 'financial_aid') == "Ask me about financial aid."
+    assert engine.tables.version == 1
+
+
+def test_progressive_responses_upgrade_or_keep_fallback():
+    """Test that progressive mode yields the fallback first, then the agent answer or nothing newer"""
+    import time
+    from transfer_counselor.core.system import EnhancedTransferCounselorSystem
+    system = EnhancedTransferCounselorSystem()
+    system._agents_available = lambda: True
+    
+    def slow_agent(agent_id, query, session_id):
+        time.sleep(0.2)
+        return {'response': "Detailed agent answer", 'cache': 'miss'}
+    system._run_agent = slow_agent
+    
+    query = "How much does UC tuition cost?"
+    phases = list(system.process_query_progressive(query, deadline=5.0))
+    assert [result['phase'] for result in phases] == ['provisional', 'final']
+    assert phases[0]['status'] == 'provisional'
+    assert phases[0]['response'] == system._generate_fallback_response(query, phases[0]['agent_used'])
+    assert phases[1]['response'] == "Detailed agent answer"
+    assert phases[1]['metadata']['upgraded']
+    
+    phases = list(system.process_query_progressive(query, deadline=0.01))
+    assert phases[-1]['status'] == 'fallback'
+    assert phases[-1]['metadata']['deadline_missed']
+    assert phases[-1]['response'] == phases[0]['response']
+
+
+def test_async_queries_share_one_event_loop():
+    """Test that concurrent async queries overlap their agent calls on one event loop"""
+    import asyncio
+    import time
+    from types import SimpleNamespace
+    from transfer_counselor.core.system import EnhancedTransferCounselorSystem
+    system = EnhancedTransferCounselorSystem()
+    system._agents_available = lambda: True
+    system.agent_manager.response_cache = system.agent_manager.semantic_cache = None
+    
+    class SleepingRunner:
+        async def run(self, agent, query, session=None):
+            await asyncio.sleep(0.2)
+            return SimpleNamespace(final_output=f"{agent.name}: {query}")
+    system.agent_manager.runner = SleepingRunner()
+    
+    async def ask_all():
+        queries = [f"How much does UC tuition cost for {n} units?" for n in range(50)]
+        return await asyncio.gather(*(system.process_query_async(query) for query in queries))
+    
+    start = time.perf_counter()
+    results = asyncio.run(ask_all())
+    assert time.perf_counter() - start < 2.0
+    assert all(result['status'] == 'success' for result in results)
+    assert results[7]['response'].endswith("for 7 units?")
+    
+    # The synchronous API wraps the same pipeline
+    assert system.process_query("How much does UC tuition cost?")['status'] == 'success'
+
+
+def test_streamed_responses_record_the_full_text():
+    """Test that streamed deltas add up to the final response, including guardrail stops and aborts"""
+    import asyncio
+    from types import SimpleNamespace
+    from openai.types.responses import ResponseTextDeltaEvent
+    from transfer_counselor.core.system import EnhancedTransferCounselorSystem
+    system = EnhancedTransferCounselorSystem()
+    system._agents_available = lambda: True
+    system.agent_manager.semantic_cache = None
+    
+    class StreamingRunner:
+        def __init__(self, chunks):
+            self.chunks = chunks
+            self.cancelled = False
+        
+        def run_streamed(self, agent, query, session=None):
+            runner = self
+            
+            async def stream_events():
+                for chunk in runner.chunks:
+                    await asyncio.sleep(0)
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield SimpleNamespace(type='raw_response_event', data=ResponseTextDeltaEvent.model_construct(
+                        type='response.output_text.delta', delta=chunk
+                    ))
+            
+            def cancel(mode='immediate'):
+                runner.cancelled = True
+            return SimpleNamespace(stream_events=stream_events, cancel=cancel, final_output=''.join(
+                chunk for chunk in runner.chunks if isinstance(chunk, str)
+            ))
+    
+    system.agent_manager.runner = StreamingRunner(["Apply to UC ", "by November ", "30th."])
+    events = list(system.process_query_stream("When is the UC transfer application deadline?"))
+    deltas = ''.join(event['text'] for event in events if event['type'] == 'delta')
+    assert events[-1]['type'] == 'final'
+    assert deltas == events[-1]['response'] == "Apply to UC by November 30th."
+    assert events[-1]['metadata']['streamed'] and events[-1]['metadata']['response_cache'] == 'miss'
+    
+    # A blocked phrase split across chunks ends the stream with the redirect
+    system.agent_manager.runner = StreamingRunner(["Transfer early. Also, get a pres", "crip", "tion for that."])
+    events = list(system.process_query_stream("How do I transfer with a heavy course load?"))
+    assert system.agent_manager.runner.cancelled
+    assert events[-1]['metadata']['output_guardrail'] == 'medical'
+    assert events[-1]['response'].endswith(system.output_guardrails.get_redirect_message('medical'))
+    assert "prescription" not in events[-1]['response']
+    
+    # A failure mid-stream appends the fallback answer
+    system.agent_manager.runner = StreamingRunner(["Start with ", ConnectionError("reset")])
+    events = list(system.process_query_stream("What should I study for my major?"))
+    assert events[-1]['status'] == 'fallback'
+    assert events[-1]["response"].startswith("Start with\n\n")
+    
+    # A reader that stops early cancels the agent run
+    system.agent_manager.runner = StreamingRunner(["One ", "two ", "three."])
+    stream = system.process_query_stream("How many units do I need to transfer?")
+    assert next(stream)['text'] == "One "
+    stream.close()
+    assert system.agent_manager.runner.cancelled
@@ -0,0 +1,78 @@
+"""
+Cache Utilities Module
+
+Provides bounded in-memory caches with hit-rate metrics.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with hit, miss and eviction counters"""
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Get a cached value and mark it as recently used"""
+        with self.lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        
+        with self.lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = value
+            
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Remove an entry, returning its value"""
+        with self.lock:
+            return self._data.pop(key, default)
+    
+    def clear(self):
+        """Drop all cached entries"""
+        with self.lock:
+            self._data.clear()
+            self.invalidations += 1
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate statistics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -8,7 +8,7 @@ import os
 import yaml
 import logging
 from typing import Dict, Any, Optional
-from dataclasses import dataclass, fields
+from dataclasses import dataclass, field, fields
 
 
 @dataclass
@@ -34,6 +34,47 @@ class SystemConfig:
     max_turns: int = 10
     timeout_seconds: int = 120
     
+    # Routing Configuration
+    routing_cache_size: int = 1024
+    routing_model_path: Optional[str] = None
+    routing_classifier_threshold: float = 0.5
+    routing_sticky_decay: float = 0.5
+    routing_sticky_threshold: float = 1.0
+    routing_history_size: int = 10
+    routing_confidence_threshold: float = 0.3
+    
+    # Guardrails
+    enable_guardrails: bool = True
+    guardrail_cache_size: int = 4096
+    
+    # Agent response cache
+    response_cache_enabled: bool = True
+    response_cache_size: int = 1024
+    response_cache_ttl: float = 3600.0
+    response_cache_agent_ttls: Dict[str, float] = field(default_factory=dict)
+    response_cache_db_path: Optional[str] = None  # SQLite file for a persistent tier
+    
+    # Semantic near-duplicate response cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_capacity: int = 4096
+    semantic_cache_dim: int = 1024
+    semantic_cache_threshold: float = 0.8  # Minimum cosine similarity for a hit
+    semantic_cache_agent_thresholds: Dict[str, float] = field(default_factory=dict)
+    
+    # Stream agent text to the interactive session as it is generated
+    stream_responses: bool = True
+    
+    # Progressive responses: fallback first, then the agent's answer
+    progressive_responses: bool = False
+    progressive_deadline: float = 20.0  # Seconds to wait for the agent before keeping the fallback
+    
+    # Fallback response table (the packaged table when unset)
+    fallback_responses_file: Optional[str] = None
+    
+    # Hot-reloadable routing and guardrail tables
+    tables_file: Optional[str] = None
+    tables_reload_interval: float = 0.0  # Seconds between file checks; 0 disables watching
+    
     # Rate Limiting
     rate_limit_requests_per_minute: int = 60
     
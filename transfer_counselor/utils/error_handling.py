@@ -4,6 +4,7 @@ Comprehensive Error Handling and Recovery System
 Provides robust error handling, retry mechanisms, and recovery strategies
 """
 
+import asyncio
 import logging
 import time
 import uuid
@@ -432,27 +433,37 @@ def with_retry(config: RetryConfig = None, error_handler: ErrorHandler = None):
                     return func(*args, **kwargs)
                 except Exception as e:
                     last_exception = e
+                    delay = _retry_delay(func, e, attempt, retry_config, handler)
+                    if delay is None:
+                        break
+                    time.sleep(delay)
                     
-                    # Handle the error
-                    context = {
-                        'component': func.__module__,
-                        'operation': func.__name__,
-                        'attempt': attempt + 1,
-                        'max_attempts': retry_config.max_attempts
-                    }
-                    
-                    error_context = handler.handle_error(e, context)
-                    error_context.recovery_attempts = attempt + 1
-                    
-                    # Check if we should retry
-                    if attempt < retry_config.max_attempts - 1:
-                        if error_context.recovery_strategy == RecoveryStrategy.RETRY:
-                            delay = _calculate_delay(attempt, retry_config)
-                            logger.info(f"Retrying {func.__name__} in {delay:.2f}s (attempt {attempt + 1}/{retry_config.max_attempts})")
-                            time.sleep(delay)
-                            continue
-                        else:
-                            break
+            # All retries exhausted
+            if last_exception:
+                raise last_exception
+        
+        return wrapper
+    return decorator
+
+def with_async_retry(config: RetryConfig = None, error_handler: ErrorHandler = None):
+    """Decorator for adding retry logic to coroutine functions, backing off without blocking the event loop"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            retry_config = config or RetryConfig()
+            handler = error_handler or _global_error_handler
+            
+            last_exception = None
+            
+            for attempt in range(retry_config.max_attempts):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    last_exception = e
+                    delay = _retry_delay(func, e, attempt, retry_config, handler)
+                    if delay is None:
+                        break
+                    await asyncio.sleep(delay)
                     
             # All retries exhausted
             if last_exception:
@@ -461,6 +472,26 @@ def with_retry(config: RetryConfig = None, error_handler: ErrorHandler = None):
         return wrapper
     return decorator
 
+def _retry_delay(func: Callable, error: Exception, attempt: int, retry_config: RetryConfig,
+                 handler: ErrorHandler) -> Optional[float]:
+    """Record a failed attempt and get the delay before the next one, or None to stop retrying"""
+    context = {
+        'component': func.__module__,
+        'operation': func.__name__,
+        'attempt': attempt + 1,
+        'max_attempts': retry_config.max_attempts
+    }
+    
+    error_context = handler.handle_error(error, context)
+    error_context.recovery_attempts = attempt + 1
+    
+    # Check if we should retry
+    if attempt < retry_config.max_attempts - 1 and error_context.recovery_strategy == RecoveryStrategy.RETRY:
+        delay = _calculate_delay(attempt, retry_config)
+        logger.info(f"Retrying {func.__name__} in {delay:.2f}s (attempt {attempt + 1}/{retry_config.max_attempts})")
+        return delay
+    return None
+
 def with_circuit_breaker(name: str, config: CircuitBreakerConfig = None, error_handler: ErrorHandler = None):
     """Decorator for adding circuit breaker protection"""
     def decorator(func: Callable) -> Callable:
@@ -1,5 +1,67 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Mapping, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+import logging
 import re
+import threading
+
+from .cache import LRUCache
+from .matching import KeywordAutomaton, TokenIndex, normalize_query, tokenize
+from .tables import load_table_file
+
+
+@dataclass(frozen=True)
+class GuardrailTables:
+    """Immutable snapshot of compiled guardrail topic tables"""
+    allowed_topics: Mapping[str, Tuple[str, ...]]
+    blocked_topics: Tuple[str, ...]
+    transfer_indicators: Tuple[str, ...]
+    index: TokenIndex
+    version: int
+    
+    @classmethod
+    def build(cls, allowed_topics: Mapping[str, List[str]], blocked_topics: List[str],
+              transfer_indicators: List[str], version: int = 0) -> "GuardrailTables":
+        """Compile topic lists into a snapshot"""
+        allowed = MappingProxyType({
+            category: tuple(keyword.lower() for keyword in keywords)
+            for category, keywords in allowed_topics.items()
+        })
+        blocked = tuple(topic.lower() for topic in blocked_topics)
+        indicators = tuple(indicator.lower() for indicator in transfer_indicators)
+        
+        entries = list(cls.iter_entries(allowed, blocked, indicators))
+        
+        return cls(
+            allowed_topics=allowed,
+            blocked_topics=blocked,
+            transfer_indicators=indicators,
+            index=TokenIndex(entries),
+            version=version
+        )
+    
+    @staticmethod
+    def iter_entries(allowed_topics: Mapping[str, Tuple[str, ...]], blocked_topics: Tuple[str, ...],
+                     transfer_indicators: Tuple[str, ...]):
+        """Yield (key, phrase, weight) index entries for every topic keyword"""
+        # Keys carry a rank so the first listed match wins, as in a sequential scan
+        rank = 0
+        for topic in blocked_topics:
+            yield ('blocked', rank, None, topic), topic, 1
+            rank += 1
+        for category, keywords in allowed_topics.items():
+            for keyword in keywords:
+                yield ('allowed', rank, category, keyword), keyword, 1
+                rank += 1
+        for indicator in transfer_indicators:
+            yield ('indicator', rank, None, indicator), indicator, 1
+            rank += 1
+    
+    def entries(self):
+        """Yield this snapshot's index entries"""
+        return self.iter_entries(self.allowed_topics, self.blocked_topics, self.transfer_indicators)
+
 
 class TransferGuardrails:
     """Guardrails system to ensure agents only respond to transfer and career-related queries"""
@@ -34,32 +96,94 @@ class TransferGuardrails:
         'financial investment', 'cryptocurrency', 'gambling'
     ]
     
-    def is_query_allowed(self, query: str) -> Dict[str, Any]:
+    TRANSFER_INDICATORS = ['transfer', 'college', 'university', 'degree', 'major', 'career']
+    
+    def __init__(self, cache_size: int = 4096):
+        self.logger = logging.getLogger(__name__)
+        self._update_lock = threading.Lock()
+        self._tables = GuardrailTables.build(
+            self.ALLOWED_TOPICS, self.BLOCKED_TOPICS, self.TRANSFER_INDICATORS
+        )
+        # Verdicts keyed by (table version, normalized query)
+        self.cache = LRUCache(cache_size)
+    
+    @property
+    def tables(self) -> GuardrailTables:
+        """Get the current immutable guardrail snapshot"""
+        return self._tables
+    
+    def update_topics(self, allowed_topics: Optional[Mapping[str, List[str]]] = None,
+                      blocked_topics: Optional[List[str]] = None,
+                      transfer_indicators: Optional[List[str]] = None):
+        """Compile new topic tables and atomically swap them in"""
+        with self._update_lock:
+            current = self._tables
+            self._tables = GuardrailTables.build(
+                allowed_topics if allowed_topics is not None else current.allowed_topics,
+                blocked_topics if blocked_topics is not None else current.blocked_topics,
+                transfer_indicators if transfer_indicators is not None else current.transfer_indicators,
+                version=current.version + 1
+            )
+            self.cache.clear()
+        self.logger.info(f"Guardrail tables updated to version {self._tables.version}")
+    
+    def reload_from_file(self, path: str):
+        """Reload guardrail topics from the 'guardrails' section of a YAML or JSON file"""
+        section = load_table_file(path).get('guardrails') or {}
+        self.update_topics(
+            allowed_topics=section.get('allowed_topics'),
+            blocked_topics=section.get('blocked_topics'),
+            transfer_indicators=section.get('transfer_indicators')
+        )
+    
+    def is_query_allowed(self, query: str, analysis: Optional[Any] = None) -> Dict[str, Any]:
         """Check if a query is related to allowed transfer/career topics"""
-        query_lower = query.lower()
+        tables = self._tables
+        normalized = analysis.normalized if analysis is not None else normalize_query(query)
+        key = (tables.version, normalized)
+        
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self._evaluate(normalized, tables, analysis)
+            self.cache.put(key, cached)
+        return dict(cached)
+    
+    def _evaluate(self, normalized: str, tables: GuardrailTables, analysis: Optional[Any] = None) -> Dict[str, Any]:
+        """Compute a verdict from the topic keywords found in a normalized query"""
+        # Reuse a shared query analysis when it was built from the current tables
+        if analysis is not None and analysis.guardrail_version == tables.version:
+            hits = analysis.guardrail_hits
+        else:
+            hits, _ = tables.index.score(tokenize(normalized))
+        return self.verdict_from_hits(hits)
+    
+    @staticmethod
+    def verdict_from_hits(hits: Iterable[Tuple[str, int, Optional[str], str]]) -> Dict[str, Any]:
+        """Build a verdict from matched (kind, rank, category, keyword) index keys"""
+        best = {}
+        for kind, rank, category, keyword in hits:
+            if kind not in best or rank < best[kind][0]:
+                best[kind] = (rank, category, keyword)
         
         # Check for blocked topics first
-        for blocked_topic in self.BLOCKED_TOPICS:
-            if blocked_topic in query_lower:
-                return {
-                    'allowed': False,
-                    'reason': f"Query contains blocked topic: {blocked_topic}",
-                    'category': 'blocked'
-                }
+        if 'blocked' in best:
+            return {
+                'allowed': False,
+                'reason': f"Query contains blocked topic: {best['blocked'][2]}",
+                'category': 'blocked'
+            }
         
         # Check for allowed topics
-        for category, keywords in self.ALLOWED_TOPICS.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return {
-                        'allowed': True,
-                        'category': category,
-                        'matched_keyword': keyword
-                    }
+        if 'allowed' in best:
+            _, category, keyword = best['allowed']
+            return {
+                'allowed': True,
+                'category': category,
+                'matched_keyword': keyword
+            }
         
         # If no specific keywords found, apply contextual analysis
-        transfer_indicators = ['transfer', 'college', 'university', 'degree', 'major', 'career']
-        if any(indicator in query_lower for indicator in transfer_indicators):
+        if 'indicator' in best:
             return {
                 'allowed': True,
                 'category': 'general_academic',
@@ -78,4 +202,220 @@ class TransferGuardrails:
             return "I'm designed to help with college transfer and career planning questions only. Please ask about UC/CSU transfers, financial aid, career counseling, or academic planning."
         elif category == 'off_topic':
             return "I can only assist with questions related to transferring to UC/CSU schools, career planning, financial aid, and academic guidance. How can I help you with your transfer goals?"
-        return "Please ask questions related to college transfer or career planning."
\ No newline at end of file
+        return "Please ask questions related to college transfer or career planning."
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get verdict cache hit-rate statistics"""
+        return self.cache.get_stats()
+
+
+def _stream_symbol(char: str) -> str:
+    """Map a streamed character to a matcher symbol (lowercase alphanumeric or space)"""
+    return char.lower() if char.isalnum() else ' '
+
+
+@dataclass(frozen=True)
+class OutputGuardrailTables:
+    """Immutable snapshot of compiled output topic tables"""
+    blocked_topics: Mapping[str, Tuple[str, ...]]
+    automaton: KeywordAutomaton
+    max_length: int
+    version: int
+    
+    @classmethod
+    def build(cls, blocked_topics: Mapping[str, List[str]], version: int = 0) -> "OutputGuardrailTables":
+        """Compile blocked output phrases into a character-level matcher"""
+        topics = MappingProxyType({
+            category: tuple(phrase.lower() for phrase in phrases)
+            for category, phrases in blocked_topics.items()
+        })
+        
+        # Phrases are padded with spaces so they only match on word boundaries
+        patterns = []
+        for category, phrases in topics.items():
+            for phrase in phrases:
+                words = re.findall(r'[^\W_]+', phrase)
+                if not words:
+                    continue
+                text = ' '.join(words)
+                patterns.append((f' {text} ', (category, phrase)))
+                if not text.endswith('s'):
+                    patterns.append((f' {text}s ', (category, phrase)))
+        
+        return cls(
+            blocked_topics=topics,
+            automaton=KeywordAutomaton(patterns),
+            max_length=max((len(pattern) for pattern, _ in patterns), default=0),
+            version=version
+        )
+
+
+class OutputStreamScanner:
+    """Incremental scanner that carries matcher state across streamed response chunks
+    
+    feed() returns the text that is safe to emit. Text that could still be the
+    start of a blocked phrase is held back until the phrase is ruled out, so a
+    blocked phrase split across chunks is caught before any of it is emitted.
+    """
+    
+    def __init__(self, tables: OutputGuardrailTables):
+        self.tables = tables
+        self.verdict: Optional[Dict[str, Any]] = None
+        
+        # The stream starts on a word boundary
+        self._state = tables.automaton.step(0, ' ')
+        self._last_space = True
+        
+        # Raw text not yet emitted, and stream offsets of recent matcher symbols
+        self._pending = ''
+        self._emitted = 0
+        self._consumed = 0
+        self._offsets: deque = deque(maxlen=max(1, tables.max_length))
+    
+    @property
+    def blocked(self) -> bool:
+        """Whether a blocked phrase has been found"""
+        return self.verdict is not None
+    
+    def _advance(self, symbol: str, offset: int) -> bool:
+        """Feed one symbol, returning True when it completes a blocked phrase"""
+        if symbol == ' ':
+            if self._last_space:
+                return False
+            self._last_space = True
+        else:
+            self._last_space = False
+        
+        automaton = self.tables.automaton
+        self._state = automaton.step(self._state, symbol)
+        self._offsets.append(offset)
+        
+        outputs = automaton.outputs(self._state)
+        if outputs:
+            category, phrase = outputs[0]
+            self.verdict = {
+                'allowed': False,
+                'category': category,
+                'matched_phrase': phrase,
+                'offset': offset
+            }
+            self._pending = ''
+            return True
+        return False
+    
+    def feed(self, chunk: str) -> str:
+        """Scan the next chunk and return the text that is now safe to emit"""
+        if self.verdict is not None:
+            return ''
+        
+        base = self._consumed
+        self._pending += chunk
+        self._consumed += len(chunk)
+        for index, char in enumerate(chunk):
+            if self._advance(_stream_symbol(char), base + index):
+                return ''
+        
+        # Hold back the raw text behind any partially matched phrase
+        depth = self.tables.automaton.depth(self._state)
+        if depth == 0:
+            hold_from = self._consumed
+        elif depth <= len(self._offsets):
+            hold_from = self._offsets[-depth]
+        else:
+            hold_from = self._emitted
+        
+        safe = self._pending[:hold_from - self._emitted]
+        self._pending = self._pending[hold_from - self._emitted:]
+        self._emitted = hold_from
+        return safe
+    
+    def close(self) -> str:
+        """End the stream, returning any held-back text that turned out to be safe"""
+        if self.verdict is not None or self._advance(' ', self._consumed):
+            return ''
+        
+        safe = self._pending
+        self._pending = ''
+        self._emitted = self._consumed
+        return safe
+
+
+class OutputGuardrails:
+    """Output-side guardrails that stop agent responses drifting into advice we must not give"""
+    
+    BLOCKED_TOPICS = {
+        'medical': [
+            'medical advice', 'diagnosis', 'diagnose', 'prescription', 'dosage',
+            'medication dose', 'milligrams'
+        ],
+        'legal': [
+            'legal advice', 'file a lawsuit', 'sue your', 'plead guilty', 'legal liability',
+            'immigration lawyer'
+        ],
+        'investment': [
+            'investment advice', 'financial investment', 'stock picks', 'buy stocks',
+            'cryptocurrency', 'bitcoin', 'day trading', 'options trading'
+        ]
+    }
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._update_lock = threading.Lock()
+        self._tables = OutputGuardrailTables.build(self.BLOCKED_TOPICS)
+    
+    @property
+    def tables(self) -> OutputGuardrailTables:
+        """Get the current immutable output guardrail snapshot"""
+        return self._tables
+    
+    def update_topics(self, blocked_topics: Mapping[str, List[str]]):
+        """Compile new blocked output topics and atomically swap them in"""
+        with self._update_lock:
+            self._tables = OutputGuardrailTables.build(blocked_topics, version=self._tables.version + 1)
+        self.logger.info(f"Output guardrail tables updated to version {self._tables.version}")
+    
+    def reload_from_file(self, path: str):
+        """Reload blocked output topics from the 'output_guardrails' section of a YAML or JSON file"""
+        section = load_table_file(path).get('output_guardrails') or {}
+        if section.get('blocked_topics') is not None:
+            self.update_topics(section['blocked_topics'])
+    
+    def scanner(self) -> OutputStreamScanner:
+        """Start scanning a new response stream against the current snapshot"""
+        return OutputStreamScanner(self._tables)
+    
+    def filter_stream(self, chunks: Iterable[str],
+                      scanner: Optional[OutputStreamScanner] = None) -> Iterator[str]:
+        """Pass response chunks through, stopping with a redirect when a blocked topic appears"""
+        scanner = scanner or self.scanner()
+        for chunk in chunks:
+            safe = scanner.feed(chunk)
+            if safe:
+                yield safe
+            if scanner.blocked:
+                break
+        else:
+            safe = scanner.close()
+            if safe:
+                yield safe
+        
+        if scanner.blocked:
+            self.logger.warning(f"Response stream stopped by output guardrails ({scanner.verdict['category']})")
+            yield self.get_redirect_message(scanner.verdict['category'])
+    
+    def check_response(self, response: str) -> Dict[str, Any]:
+        """Check a complete response"""
+        scanner = self.scanner()
+        scanner.feed(response)
+        scanner.close()
+        return scanner.verdict or {'allowed': True}
+    
+    def get_redirect_message(self, category: str) -> str:
+        """Generate the replacement text for a stopped response"""
+        advice = {
+            'medical': 'medical',
+            'legal': 'legal',
+            'investment': 'investment'
+        }.get(category, 'that kind of')
+        return (f"\n\nI can't provide {advice} advice. Please consult a qualified professional, "
+                "and let me know how I can help with your transfer, financial aid, career, or academic planning.")
@@ -0,0 +1,168 @@
+"""
+Keyword Matching Module
+
+Provides compiled multi-pattern matchers shared by routing and validation.
+"""
+
+import re
+import zlib
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]|_")
+
+
+def normalize_query(text: str) -> str:
+    """Casefold a query, strip punctuation and collapse whitespace for use as a cache key"""
+    return ' '.join(_PUNCTUATION_PATTERN.sub(' ', text.casefold()).split())
+
+
+def normalize_token(token: str) -> str:
+    """Normalize a lowercase token so simple plurals match their singular form"""
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized word tokens"""
+    return [normalize_token(token) for token in _TOKEN_PATTERN.findall(text.lower())]
+
+
+def hash_ngrams(tokens: Sequence[str], n_features: int, ngram_range: Tuple[int, int] = (1, 2)) -> List[int]:
+    """Hash token n-grams into feature indices with a process-independent hash"""
+    features = []
+    min_n, max_n = ngram_range
+    for n in range(min_n, max_n + 1):
+        for start in range(len(tokens) - n + 1):
+            ngram = ' '.join(tokens[start:start + n])
+            features.append(zlib.crc32(ngram.encode('utf-8')) % n_features)
+    return features
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton matching many keywords in a single pass
+    
+    Patterns are sequences of hashable symbols (characters of a string or
+    tokens of a phrase). Each pattern carries a payload that is reported
+    whenever the pattern occurs in the scanned input.
+    """
+    
+    def __init__(self, patterns: Iterable[Tuple[Sequence[Hashable], Any]]):
+        # Trie transitions, failure links and per-state outputs
+        self._goto: List[Dict[Hashable, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+        self._depth: List[int] = [0]
+        self.pattern_count = 0
+        
+        for pattern, payload in patterns:
+            self._add_pattern(pattern, payload)
+        
+        self._build_failure_links()
+    
+    def _add_pattern(self, pattern: Sequence[Hashable], payload: Any):
+        """Insert a pattern into the trie"""
+        if not pattern:
+            return
+        
+        state = 0
+        for symbol in pattern:
+            next_state = self._goto[state].get(symbol)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][symbol] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._depth.append(self._depth[state] + 1)
+            state = next_state
+        
+        self._output[state].append(payload)
+        self.pattern_count += 1
+    
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and merge suffix outputs"""
+        queue = deque(self._goto[0].values())
+        
+        while queue:
+            state = queue.popleft()
+            for symbol, next_state in self._goto[state].items():
+                queue.append(next_state)
+                
+                fallback = self._fail[state]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                
+                candidate = self._goto[fallback].get(symbol, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+    
+    def step(self, state: int, symbol: Hashable) -> int:
+        """Advance the automaton by one symbol"""
+        goto = self._goto
+        while state and symbol not in goto[state]:
+            state = self._fail[state]
+        return goto[state].get(symbol, 0)
+    
+    def outputs(self, state: int) -> List[Any]:
+        """Get payloads of all patterns ending at a state"""
+        return self._output[state]
+    
+    def depth(self, state: int) -> int:
+        """Get the length of the pattern prefix a state represents"""
+        return self._depth[state]
+    
+    def iter_matches(self, sequence: Iterable[Hashable], state: int = 0) -> Iterator[Tuple[int, Any]]:
+        """Yield (end_index, payload) for every pattern occurrence in the sequence"""
+        for index, symbol in enumerate(sequence):
+            state = self.step(state, symbol)
+            for payload in self._output[state]:
+                yield index, payload
+    
+    def find_payloads(self, sequence: Iterable[Hashable]) -> List[Any]:
+        """Get payloads of all patterns found in the sequence, in match order"""
+        return [payload for _, payload in self.iter_matches(sequence)]
+
+
+class TokenIndex:
+    """Inverted index from tokens and token n-grams to weighted postings
+    
+    Entries are (key, phrase, weight) triples. Phrases are tokenized, so
+    multi-word phrases only match as whole consecutive tokens and single
+    words never match inside longer words.
+    """
+    
+    def __init__(self, entries: Iterable[Tuple[Hashable, str, float]]):
+        self.postings: Dict[Tuple[str, ...], Dict[Hashable, float]] = {}
+        self.phrases: Dict[Tuple[str, ...], str] = {}
+        
+        for key, phrase, weight in entries:
+            ngram = tuple(tokenize(phrase))
+            if not ngram:
+                continue
+            postings = self.postings.setdefault(ngram, {})
+            postings[key] = postings.get(key, 0) + weight
+            self.phrases.setdefault(ngram, phrase)
+        
+        # Phrase lookup is a single automaton pass over the query tokens
+        self._automaton = KeywordAutomaton((ngram, ngram) for ngram in self.postings)
+    
+    def find(self, tokens: Sequence[str]) -> List[Tuple[str, ...]]:
+        """Get distinct n-grams present in the tokens, in order of first match"""
+        return list(dict.fromkeys(self._automaton.find_payloads(tokens)))
+    
+    def score(self, tokens: Sequence[str]) -> Tuple[Dict[Hashable, float], Dict[Hashable, List[str]]]:
+        """Sum postings of matched n-grams per key and collect matched phrases"""
+        scores: Dict[Hashable, float] = {}
+        matched: Dict[Hashable, List[str]] = {}
+        
+        for ngram in self.find(tokens):
+            phrase = self.phrases[ngram]
+            for key, weight in self.postings[ngram].items():
+                scores[key] = scores.get(key, 0) + weight
+                matched.setdefault(key, []).append(phrase)
+        
+        return scores, matched
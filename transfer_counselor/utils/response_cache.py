@@ -0,0 +1,171 @@
+"""
+Response Cache Module
+
+Exact-match cache of agent responses with per-agent TTLs, an in-memory LRU tier
+and an optional SQLite tier that survives restarts.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .cache import LRUCache
+from .matching import normalize_query
+
+
+def agent_fingerprint(instructions: str, model: Any = None, model_settings: Any = None) -> str:
+    """Hash an agent's instructions and model configuration"""
+    payload = f"{instructions}\x1f{model!r}\x1f{model_settings!r}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier exact-match cache of agent responses"""
+    
+    def __init__(self, maxsize: int = 1024, default_ttl: float = 3600.0,
+                 agent_ttls: Optional[Mapping[str, float]] = None, db_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.default_ttl = default_ttl
+        self.agent_ttls = dict(agent_ttls or {})
+        self.db_path = db_path
+        
+        # Memory tier values are (response, expires_at)
+        self.memory = LRUCache(maxsize)
+        
+        self._stats_lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'bypassed': 0, 'stores': 0}
+        
+        if self.db_path:
+            self._initialize_db()
+    
+    def _initialize_db(self):
+        """Create the SQLite tier's table"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS response_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        agent_id TEXT,
+                        response TEXT,
+                        expires_at REAL,
+                        created_at REAL
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            self.logger.error(f"Failed to initialize response cache database: {e}")
+            self.db_path = None
+    
+    def _count(self, stat: str):
+        """Increment a cache counter"""
+        with self._stats_lock:
+            self.stats[stat] += 1
+    
+    def make_key(self, agent_id: str, query: str, fingerprint: str) -> str:
+        """Build the cache key from the agent, normalized query and agent fingerprint"""
+        payload = f"{agent_id}\x1f{normalize_query(query)}\x1f{fingerprint}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def ttl_for(self, agent_id: str) -> float:
+        """Get the time-to-live for an agent's responses"""
+        return self.agent_ttls.get(agent_id, self.default_ttl)
+    
+    def get(self, key: str) -> Tuple[Optional[str], str]:
+        """Look up a response, returning (response, tier) where tier is 'memory', 'disk' or 'miss'"""
+        now = time.time()
+        
+        entry = self.memory.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if expires_at > now:
+                self._count('memory_hits')
+                return response, 'memory'
+            self.memory.pop(key)
+            self._count('expired')
+        
+        if self.db_path:
+            entry = self._get_from_disk(key, now)
+            if entry is not None:
+                response, expires_at = entry
+                self.memory.put(key, (response, expires_at))
+                self._count('disk_hits')
+                return response, 'disk'
+        
+        self._count('misses')
+        return None, 'miss'
+    
+    def _get_from_disk(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        """Read an unexpired entry from the SQLite tier"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT response, expires_at FROM response_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] <= now:
+                    conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (key,))
+                    conn.commit()
+                    self._count('expired')
+                    return None
+                return row[0], row[1]
+        except Exception as e:
+            self.logger.error(f"Failed to read response cache entry: {e}")
+            return None
+    
+    def put(self, key: str, agent_id: str, response: str):
+        """Store a response in both tiers with the agent's TTL"""
+        ttl = self.ttl_for(agent_id)
+        if ttl <= 0:
+            return
+        
+        now = time.time()
+        expires_at = now + ttl
+        self.memory.put(key, (response, expires_at))
+        self._count('stores')
+        
+        if self.db_path:
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    conn.execute("""
+                        INSERT OR REPLACE INTO response_cache
+                        (cache_key, agent_id, response, expires_at, created_at)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (key, agent_id, response, expires_at, now))
+                    conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+                    conn.commit()
+            except Exception as e:
+                self.logger.error(f"Failed to write response cache entry: {e}")
+    
+    def record_bypass(self):
+        """Count a request that skipped the cache because it carried session context"""
+        self._count('bypassed')
+    
+    def clear(self):
+        """Drop all cached responses from both tiers"""
+        self.memory.clear()
+        if self.db_path:
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    conn.execute("DELETE FROM response_cache")
+                    conn.commit()
+            except Exception as e:
+                self.logger.error(f"Failed to clear response cache: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss and bypass counts for both tiers"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        stats.update({
+            'hits': hits,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_size': len(self.memory),
+            'maxsize': self.memory.maxsize,
+            'persistent': bool(self.db_path)
+        })
+        return stats
@@ -0,0 +1,166 @@
+"""
+Semantic Cache Module
+
+Near-duplicate response cache using locally hashed query embeddings and
+vectorized cosine similarity.
+"""
+
+import logging
+import threading
+import time
+import zlib
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .matching import tokenize
+
+
+# Function words that carry little meaning for matching paraphrased questions
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'at', 'be', 'can', 'could', 'do', 'doe', 'for', 'how', 'i', 'in',
+    'is', 'it', 'me', 'much', 'my', 'of', 'on', 'or', 'should', 'tell', 'the', 'to', 'what',
+    'when', 'where', 'which', 'who', 'why', 'will', 'with', 'would', 'you', 'your'
+])
+
+
+class HashingEmbedder:
+    """Deterministic signed hashing vectorizer over content-word unigrams and bigrams"""
+    
+    def __init__(self, dim: int = 1024, bigram_weight: float = 0.5):
+        self.dim = dim
+        self.bigram_weight = bigram_weight
+    
+    def _add(self, vector: np.ndarray, feature: str, weight: float):
+        """Hash a feature into the vector, using one hash bit as its sign"""
+        digest = zlib.crc32(feature.encode('utf-8'))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % self.dim] += sign * weight
+    
+    def embed(self, query: str) -> np.ndarray:
+        """Embed a query as an L2-normalized float32 vector"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = [token for token in tokenize(query) if token not in STOPWORDS]
+        
+        for token in tokens:
+            self._add(vector, token, 1.0)
+        for first, second in zip(tokens, tokens[1:]):
+            self._add(vector, f"{first} {second}", self.bigram_weight)
+        
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticResponseCache:
+    """Bounded near-duplicate cache scoped by agent and agent fingerprint
+    
+    Embeddings live in one preallocated matrix. A lookup is a single
+    matrix-vector product masked to live entries of the same scope; the
+    least recently used slot is evicted when the matrix is full.
+    """
+    
+    def __init__(self, capacity: int = 4096, dim: int = 1024, threshold: float = 0.8,
+                 agent_thresholds: Optional[Mapping[str, float]] = None, ttl: float = 3600.0):
+        self.logger = logging.getLogger(__name__)
+        self.capacity = capacity
+        self.threshold = threshold
+        self.agent_thresholds = dict(agent_thresholds or {})
+        self.ttl = ttl
+        self.embedder = HashingEmbedder(dim)
+        
+        self.lock = threading.Lock()
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.scopes = np.full(capacity, -1, dtype=np.int64)
+        self.expires_at = np.zeros(capacity, dtype=np.float64)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.responses: list = [None] * capacity
+        self.queries: list = [None] * capacity
+        
+        self._scope_ids: Dict[Tuple[str, str], int] = {}
+        self._clock = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bypassed': 0}
+    
+    def threshold_for(self, agent_id: str) -> float:
+        """Get the similarity threshold for an agent"""
+        return self.agent_thresholds.get(agent_id, self.threshold)
+    
+    def _scope_id(self, agent_id: str, fingerprint: str) -> int:
+        """Map an (agent, fingerprint) scope to a small integer"""
+        return self._scope_ids.setdefault((agent_id, fingerprint), len(self._scope_ids))
+    
+    def lookup(self, agent_id: str, fingerprint: str, query: str) -> Tuple[Optional[str], float]:
+        """Find the most similar live entry, returning (response or None, best similarity)"""
+        vector = self.embedder.embed(query)
+        now = time.time()
+        
+        with self.lock:
+            scope = self._scope_id(agent_id, fingerprint)
+            live = (self.scopes == scope) & (self.expires_at > now)
+            if not live.any() or not vector.any():
+                self.stats['misses'] += 1
+                return None, 0.0
+            
+            similarities = self.vectors @ vector
+            similarities[~live] = -1.0
+            best = int(similarities.argmax())
+            score = float(similarities[best])
+            
+            if score >= self.threshold_for(agent_id):
+                self._clock += 1
+                self.last_used[best] = self._clock
+                self.stats['hits'] += 1
+                return self.responses[best], score
+            
+            self.stats['misses'] += 1
+            return None, score
+    
+    def put(self, agent_id: str, fingerprint: str, query: str, response: str):
+        """Store a response, evicting an expired or least recently used slot when full"""
+        vector = self.embedder.embed(query)
+        if not vector.any():
+            return
+        now = time.time()
+        
+        with self.lock:
+            free = np.flatnonzero((self.scopes < 0) | (self.expires_at <= now))
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(self.last_used.argmin())
+                self.stats['evictions'] += 1
+            
+            self._clock += 1
+            self.vectors[slot] = vector
+            self.scopes[slot] = self._scope_id(agent_id, fingerprint)
+            self.expires_at[slot] = now + self.ttl
+            self.last_used[slot] = self._clock
+            self.responses[slot] = response
+            self.queries[slot] = query
+            self.stats['stores'] += 1
+    
+    def record_bypass(self):
+        """Count a request that skipped the cache because it carried session context"""
+        with self.lock:
+            self.stats['bypassed'] += 1
+    
+    def clear(self):
+        """Drop all entries"""
+        with self.lock:
+            self.scopes[:] = -1
+            self.responses = [None] * self.capacity
+            self.queries = [None] * self.capacity
+    
+    def __len__(self) -> int:
+        return int((self.scopes >= 0).sum())
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss and eviction counts"""
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'size': len(self),
+            'capacity': self.capacity,
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0
+        })
+        return stats
@@ -0,0 +1,77 @@
+"""
+Table Reloading Module
+
+Loads routing and guardrail tables from disk and watches the file for edits.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+import yaml
+
+
+def load_table_file(path: str) -> Dict[str, Any]:
+    """Load a YAML or JSON table file into a dictionary"""
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+    
+    if not isinstance(data, dict):
+        raise ValueError(f"Table file {path} must contain a mapping")
+    return data
+
+
+class TableFileWatcher:
+    """Background watcher that reloads tables when the file's modification time changes"""
+    
+    def __init__(self, path: str, on_change: Callable[[str], None], interval: float = 5.0):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        
+        self._last_mtime: Optional[float] = self._get_mtime()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _get_mtime(self) -> Optional[float]:
+        """Get the file's modification time, or None if it is missing"""
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+    
+    def check(self) -> bool:
+        """Reload if the file changed since the last check"""
+        mtime = self._get_mtime()
+        if mtime is None or mtime == self._last_mtime:
+            return False
+        
+        self._last_mtime = mtime
+        try:
+            self.on_change(self.path)
+            self.logger.info(f"Reloaded tables from {self.path}")
+            return True
+        except Exception as e:
+            # Keep serving the previous snapshot when the new file is invalid
+            self.logger.error(f"Failed to reload tables from {self.path}: {e}")
+            return False
+    
+    def _run(self):
+        """Poll the file until stopped"""
+        while not self._stop_event.wait(self.interval):
+            self.check()
+    
+    def start(self):
+        """Start watching in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="table-file-watcher", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop watching"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None